@@ -7,6 +7,11 @@ from supabase import create_client, Client
 from app.config import settings
 
 
+# Prompts only use the start of scraped_insights; trim once on load
+# rather than on every prompt render
+MAX_INSIGHTS_CHARS = 500
+
+
 def get_supabase() -> Client:
     """Get Supabase client."""
     return create_client(
@@ -47,7 +52,12 @@ async def get_brand_for_posting(brand_id: str, require_auto_post: bool = True) -
         if not result.data:
             return None
         
-        return result.data[0]
+        brand = result.data[0]
+        insights = brand.get("scraped_insights")
+        if insights:
+            brand["scraped_insights"] = insights[:MAX_INSIGHTS_CHARS]
+        
+        return brand
         
     except Exception as e:
         print(f"Failed to fetch brand: {e}")
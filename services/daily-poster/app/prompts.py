@@ -7,122 +7,52 @@ Uses ALL brand data from brand_agent table to generate
 high-quality, on-brand daily posts.
 """
 
+import functools
+import json
+import random
+from itertools import islice
 
-def build_post_generation_prompt(
-    brand_data: dict,
-    user_input: str = None,
-    tone: str = "engaging"
-) -> tuple[str, str, str]:
-    """
-    Build system and user prompts for daily post generation.
-    
-    Uses ALL fields from brand_agent table:
-    - Brand identity (name, description, values)
-    - Products and unique value  
-    - Target market and communication style
-    - Content pillars and differentiation
-    - Personality and tone
-    - And more!
-    
-    Args:
-        brand_data: Complete brand_agent row from Supabase
-        user_input: User's specific post idea/topic (optional)
-        tone: Desired tone for the post (engaging, professional, casual, inspiring, humorous)
-        
-    Returns:
-        (system_prompt, user_prompt, url_suffix) tuple
-    """
-    
-    # Extract brand info
-    brand_name = brand_data.get("brand_name") or brand_data.get("name", "Our Brand")
-    description = brand_data.get("description", "")
-    personality = brand_data.get("personality", "professional")
-    website = brand_data.get("website", "")
-    
-    # Build comprehensive system prompt
-    system_prompt = f"""You are the social media voice for {brand_name}.
 
-=== BRAND IDENTITY ===
-Brand: {brand_name}
-"""
-    
-    # Add description
-    if description:
-        system_prompt += f"About us: {description}\n"
-    
-    # Add products/services
-    products = brand_data.get("products")
-    if products:
-        system_prompt += f"Products/Services: {products}\n"
-    
-    # Add unique value proposition
-    unique_value = brand_data.get("unique_value")
-    if unique_value:
-        system_prompt += f"What makes us unique: {unique_value}\n"
-    
-    # Add brand values
-    brand_values = brand_data.get("brand_values")
-    if brand_values:
-        system_prompt += f"Our values: {brand_values}\n"
-    
-    system_prompt += "\n"
-    
-    # Add communication style
-    communication_style = brand_data.get("communication_style")
-    if communication_style:
-        system_prompt += f"=== COMMUNICATION STYLE ===\n{communication_style}\n\n"
-    
-    # Add personality
-    if personality:
-        system_prompt += f"Personality: {personality}\n\n"
-    
-    # Add target market
-    target_market = brand_data.get("target_market")
-    if target_market:
-        system_prompt += f"=== TARGET AUDIENCE ===\n{target_market}\n\n"
-    
-    # Add content pillars (IMPORTANT!)
-    content_pillars = brand_data.get("content_pillars")
-    if content_pillars:
-        system_prompt += f"=== CONTENT FOCUS (What to post about) ===\n{content_pillars}\n\n"
-    
-    # Add differentiation
-    differentiation = brand_data.get("differentiation")
-    if differentiation:
-        system_prompt += f"=== HOW WE STAND OUT ===\n{differentiation}\n\n"
-    
-    # Add business type context
-    business_type = brand_data.get("business_type")
-    if business_type:
-        system_prompt += f"Business Type: {business_type}\n\n"
-    
-    # Add scraped insights (if available)
-    insights = brand_data.get("scraped_insights")
-    if insights:
-        system_prompt += f"=== KEY INSIGHTS ===\n{insights[:500]}\n\n"
-    
-    # Add success metrics (what we care about)
-    success_metrics = brand_data.get("success_metrics")
-    if success_metrics:
-        system_prompt += f"=== SUCCESS METRICS ===\n{success_metrics}\n\n"
-    
-    # Add additional info
-    additional_info = brand_data.get("additional_info")
-    if additional_info:
-        system_prompt += f"=== ADDITIONAL CONTEXT ===\n{additional_info}\n\n"
-    
-    # Add question responses (JSONB)
-    question_responses = brand_data.get("question_responses")
-    if question_responses and isinstance(question_responses, dict):
-        system_prompt += "=== USER RESPONSES ===\n"
-        for key, value in list(question_responses.items())[:5]:
-            if value:
-                system_prompt += f"- {key}: {value}\n"
-        system_prompt += "\n"
-    
-    # Add tone-specific instructions
-    tone_instructions = {
-        "engaging": """
+# brand_agent fields that feed the system prompt
+_PROMPT_FIELDS = (
+    "brand_name",
+    "name",
+    "description",
+    "personality",
+    "website",
+    "products",
+    "unique_value",
+    "brand_values",
+    "communication_style",
+    "target_market",
+    "content_pillars",
+    "differentiation",
+    "business_type",
+    "scraped_insights",
+    "success_metrics",
+    "additional_info",
+    "question_responses",
+)
+
+
+# Content angles picked at random when no user input is given
+_POST_APPROACHES = (
+    "Share a valuable insight related to our content pillars that our audience will find helpful",
+    "Ask a thought-provoking question that sparks discussion among our target audience",
+    "Share a behind-the-scenes moment that humanizes our brand",
+    "Provide a quick tip or hack related to what we do",
+    "Share a surprising fact or statistic relevant to our industry",
+    "Tell a micro-story that illustrates our brand values",
+    "Challenge a common misconception in our space",
+    "Share what we're working on or excited about",
+    "Provide perspective on a trend in our industry",
+    "Share a lesson we've learned that others can benefit from",
+)
+
+
+# Tone-specific instructions appended to the system prompt
+_TONE_INSTRUCTIONS = {
+    "engaging": """
 === TONE: ENGAGING ===
 - Hook readers immediately with curiosity or intrigue
 - Use pattern interrupts (surprising facts, bold statements)
@@ -130,8 +60,8 @@ Brand: {brand_name}
 - Create a sense of urgency or FOMO when appropriate
 - Use power words that grab attention
 - Make it conversational and relatable""",
-        
-        "professional": """
+    
+    "professional": """
 === TONE: PROFESSIONAL ===
 - Use clear, authoritative language
 - Focus on facts, data, and expertise
@@ -139,8 +69,8 @@ Brand: {brand_name}
 - Maintain credibility and trust
 - Avoid casual slang or excessive emojis
 - Position as an industry leader""",
-        
-        "casual": """
+    
+    "casual": """
 === TONE: CASUAL ===
 - Write like you're talking to a friend
 - Use contractions and relaxed language
@@ -148,8 +78,8 @@ Brand: {brand_name}
 - Share authentic moments and insights
 - Use emojis naturally (2-3 is fine)
 - Keep it light and conversational""",
-        
-        "inspiring": """
+    
+    "inspiring": """
 === TONE: INSPIRING ===
 - Uplift and motivate your audience
 - Share powerful insights and lessons
@@ -157,8 +87,8 @@ Brand: {brand_name}
 - Connect to bigger purpose and meaning
 - Encourage action and growth
 - Be authentic and heartfelt""",
-        
-        "humorous": """
+    
+    "humorous": """
 === TONE: HUMOROUS ===
 - Be witty and clever (not forced)
 - Use wordplay or unexpected twists when appropriate
@@ -166,20 +96,178 @@ Brand: {brand_name}
 - Relate humor to the topic at hand
 - Avoid controversial or offensive jokes
 - Make it shareable and memorable"""
-    }
+}
+
+
+# Theme-specific user prompts
+_THEMES = {
+    "monday_motivation": "Generate an inspiring Monday motivation tweet that aligns with our brand values and energizes our target audience to start the week strong.",
+    
+    "tuesday_tip": "Share a valuable, actionable tip related to our content pillars that our audience can implement today.",
+    
+    "wednesday_wisdom": "Share an insightful perspective or industry wisdom that showcases our expertise and helps our audience.",
+    
+    "thursday_thought": "Pose a thought-provoking question to our audience that sparks discussion around our content areas.",
+    
+    "friday_feature": "Highlight something interesting about our product, team, or process that shows what makes us unique.",
+    
+    "weekend_insight": "Share a weekend-appropriate insight or reflection that resonates with our audience while staying on-brand.",
+    
+    "product_highlight": "Showcase one of our products/services in an engaging, non-salesy way that highlights the value it provides.",
+    
+    "behind_the_scenes": "Give a behind-the-scenes look at our company that humanizes our brand and builds connection.",
+    
+    "customer_value": "Focus on a specific way we help our customers succeed, told through the lens of their needs.",
+    
+    "industry_insight": "Share a relevant industry trend or insight that demonstrates our expertise and adds value."
+}
+
+
+# Action type specific prompt styles
+_ACTION_PROMPTS = {
+    "announcement": "Create an exciting announcement tweet that grabs attention and clearly communicates the news. Make it newsworthy and shareable.",
+    
+    "engagement": "Create a tweet that encourages replies and interaction. Ask a thought-provoking question or start a discussion that your audience will want to engage with.",
+    
+    "excitement": "Build hype and excitement! Create anticipation with a teaser or behind-the-scenes content that makes people curious and eager to learn more.",
+    
+    "promotion": "Promote this offering in a compelling way that drives action. Highlight the value and benefits without being too salesy. Create urgency if appropriate.",
+    
+    "education": "Share valuable knowledge in a clear, helpful way. Teach something useful that your audience can apply. Be the expert they trust.",
+    
+    "community": "Celebrate community wins, share customer stories, or highlight your audience. Build connection and make people feel part of something bigger.",
+    
+    "metrics": "Share this achievement or milestone in a way that's impressive yet authentic. Make it relatable and show the journey, not just the destination."
+}
+
+
+# Optional brand sections, in prompt order. A section is rendered only
+# when its field is set; missing ones format to "" via _Defaulting.
+_BRAND_SECTIONS = {
+    "description": "About us: {}\n",
+    "products": "Products/Services: {}\n",
+    "unique_value": "What makes us unique: {}\n",
+    "brand_values": "Our values: {}\n",
+    "communication_style": "=== COMMUNICATION STYLE ===\n{}\n\n",
+    "personality": "Personality: {}\n\n",
+    "target_market": "=== TARGET AUDIENCE ===\n{}\n\n",
+    "content_pillars": "=== CONTENT FOCUS (What to post about) ===\n{}\n\n",
+    "differentiation": "=== HOW WE STAND OUT ===\n{}\n\n",
+    "business_type": "Business Type: {}\n\n",
+    "scraped_insights": "=== KEY INSIGHTS ===\n{}\n\n",
+    "success_metrics": "=== SUCCESS METRICS ===\n{}\n\n",
+    "additional_info": "=== ADDITIONAL CONTEXT ===\n{}\n\n",
+}
+
+_BRAND_BLOCK_TEMPLATE = (
+    "=== BRAND IDENTITY ===\n"
+    "Brand: {brand_name}\n"
+    "{description}{products}{unique_value}{brand_values}\n"
+    "{communication_style}{personality}{target_market}{content_pillars}"
+    "{differentiation}{business_type}{scraped_insights}{success_metrics}"
+    "{additional_info}{question_responses}"
+)
+
+
+class _Defaulting(dict):
+    """format_map mapping that renders unset sections as empty strings."""
+    
+    def __missing__(self, key):
+        return ""
+
+
+def _prompt_cache_key(brand_data: dict) -> str:
+    """
+    Stable key for the prompt-relevant part of a brand row.
+    
+    Only keys present on the row are included so that .get() defaults
+    behave exactly as they do on the original dict.
+    """
+    return json.dumps(
+        {k: brand_data[k] for k in _PROMPT_FIELDS if k in brand_data},
+        default=str
+    )
+
+
+@functools.lru_cache(maxsize=1024)
+def _url_suffix_and_limit(website: str) -> tuple[str, int, str]:
+    """
+    Work out the URL suffix for a brand website.
     
-    system_prompt += tone_instructions.get(tone, tone_instructions["engaging"])
+    Returns:
+        (url_suffix, char_limit, cta_block) tuple; empty suffix and block
+        with the full 280 characters when there is no website
+    """
+    if not website:
+        return "", 280, ""
+    
+    # Reserve space for URL suffix: "\n\nTry it: [URL]"
+    # Format: "\n\nTry it: website.com" (shortest form)
+    url_suffix = f"\n\nTry it: {website}"
+    chars_needed = len(url_suffix)
+    cta_block = f"\n\n=== CALL-TO-ACTION ===\nYour tweet will automatically include our website link at the end.\nReserved space: {chars_needed} characters for URL\n"
+    
+    return url_suffix, 280 - chars_needed, cta_block
+
+
+@functools.lru_cache(maxsize=512)
+def _build_brand_identity_block(brand_json: str) -> str:
+    """
+    Render the brand sections of the system prompt.
+    
+    Doesn't depend on tone, so one render serves every tone for a brand.
+    """
+    brand_data = json.loads(brand_json)
+    g = brand_data.get
+    
+    # A missing personality falls back to the default; an explicit empty
+    # value leaves the section out
+    brand_data.setdefault("personality", "professional")
+    
+    sections = _Defaulting(
+        (field, section.format(value))
+        for field, section in _BRAND_SECTIONS.items()
+        if (value := g(field))
+    )
+    sections["brand_name"] = g("brand_name") or g("name", "Our Brand")
+    
+    # Add question responses (JSONB)
+    question_responses = g("question_responses")
+    if question_responses and isinstance(question_responses, dict):
+        sections["question_responses"] = "=== USER RESPONSES ===\n" + "".join(
+            f"- {key}: {value}\n"
+            for key, value in islice(question_responses.items(), 5)
+            if value
+        ) + "\n"
+    
+    return _BRAND_BLOCK_TEMPLATE.format_map(sections)
+
+
+@functools.lru_cache(maxsize=512)
+def _build_system_prompt_cached(brand_json: str, tone: str) -> tuple[str, str, int]:
+    """
+    Render the system prompt for a brand.
+    
+    Cached on the serialized brand fields, so edits to the brand row
+    produce a new key and never serve a stale prompt.
+    
+    Returns:
+        (system_prompt, url_suffix, char_limit) tuple
+    """
+    brand_data = json.loads(brand_json)
+    g = brand_data.get
+    brand_name = g("brand_name") or g("name", "Our Brand")
+    
+    # Build comprehensive system prompt
+    system_prompt = f"You are the social media voice for {brand_name}.\n\n"
+    system_prompt += _build_brand_identity_block(brand_json)
+    
+    # Add tone-specific instructions
+    system_prompt += _TONE_INSTRUCTIONS.get(tone, _TONE_INSTRUCTIONS["engaging"])
     
     # Calculate space needed for URL if we have one
-    url_suffix = ""
-    char_limit = 280
-    if website:
-        # Reserve space for URL suffix: "\n\nTry it: [URL]"
-        # Format: "\n\nTry it: website.com" (shortest form)
-        url_suffix = f"\n\nTry it: {website}"
-        chars_needed = len(url_suffix)
-        char_limit = 280 - chars_needed
-        system_prompt += f"\n\n=== CALL-TO-ACTION ===\nYour tweet will automatically include our website link at the end.\nReserved space: {chars_needed} characters for URL\n"
+    url_suffix, char_limit, cta_block = _url_suffix_and_limit(g("website", ""))
+    system_prompt += cta_block
     
     # Add posting guidelines
     system_prompt += f"""
@@ -198,10 +286,24 @@ Brand: {brand_name}
 IMPORTANT: Generate ONLY the tweet text, nothing else. No quotes, no labels, just the tweet.
 """
     
-    # Build dynamic user prompt based on user input
+    return system_prompt, url_suffix, char_limit
+
+
+def _build_system_prompt(brand_data: dict, tone: str = "engaging") -> tuple[str, str, int]:
+    """
+    Build the (memoized) system prompt for a brand.
+    
+    Returns:
+        (system_prompt, url_suffix, char_limit) tuple
+    """
+    return _build_system_prompt_cached(_prompt_cache_key(brand_data), tone)
+
+
+def _build_user_prompt(user_input: str, tone: str, char_limit: int) -> str:
+    """Build the user prompt for a daily post."""
     if user_input:
         # User provided specific input - build prompt around it
-        user_prompt = f"""Create a compelling tweet about the following:
+        return f"""Create a compelling tweet about the following:
 
 {user_input}
 
@@ -216,24 +318,9 @@ Requirements:
 Tweet text:"""
     else:
         # No user input - generate varied content
-        import random
-        
-        approaches = [
-            "Share a valuable insight related to our content pillars that our audience will find helpful",
-            "Ask a thought-provoking question that sparks discussion among our target audience",
-            "Share a behind-the-scenes moment that humanizes our brand",
-            "Provide a quick tip or hack related to what we do",
-            "Share a surprising fact or statistic relevant to our industry",
-            "Tell a micro-story that illustrates our brand values",
-            "Challenge a common misconception in our space",
-            "Share what we're working on or excited about",
-            "Provide perspective on a trend in our industry",
-            "Share a lesson we've learned that others can benefit from"
-        ]
+        selected_approach = random.choice(_POST_APPROACHES)
         
-        selected_approach = random.choice(approaches)
-        
-        user_prompt = f"""Generate a high-quality tweet for our brand.
+        return f"""Generate a high-quality tweet for our brand.
 
 Approach: {selected_approach}
 
@@ -245,6 +332,34 @@ Requirements:
 - Make it unique and memorable
 
 Tweet text:"""
+
+
+def build_post_generation_prompt(
+    brand_data: dict,
+    user_input: str = None,
+    tone: str = "engaging"
+) -> tuple[str, str, str]:
+    """
+    Build system and user prompts for daily post generation.
+    
+    Uses ALL fields from brand_agent table:
+    - Brand identity (name, description, values)
+    - Products and unique value  
+    - Target market and communication style
+    - Content pillars and differentiation
+    - Personality and tone
+    - And more!
+    
+    Args:
+        brand_data: Complete brand_agent row from Supabase
+        user_input: User's specific post idea/topic (optional)
+        tone: Desired tone for the post (engaging, professional, casual, inspiring, humorous)
+        
+    Returns:
+        (system_prompt, user_prompt, url_suffix) tuple
+    """
+    system_prompt, url_suffix, char_limit = _build_system_prompt(brand_data, tone)
+    user_prompt = _build_user_prompt(user_input, tone, char_limit)
     
     return system_prompt, user_prompt, url_suffix
 
@@ -260,32 +375,9 @@ def build_themed_post_prompt(brand_data: dict, theme: str) -> tuple[str, str]:
     Returns:
         (system_prompt, user_prompt) tuple
     """
-    system_prompt, _ = build_post_generation_prompt(brand_data)
+    system_prompt, _, _ = _build_system_prompt(brand_data)
     
-    # Theme-specific user prompts
-    themes = {
-        "monday_motivation": "Generate an inspiring Monday motivation tweet that aligns with our brand values and energizes our target audience to start the week strong.",
-        
-        "tuesday_tip": "Share a valuable, actionable tip related to our content pillars that our audience can implement today.",
-        
-        "wednesday_wisdom": "Share an insightful perspective or industry wisdom that showcases our expertise and helps our audience.",
-        
-        "thursday_thought": "Pose a thought-provoking question to our audience that sparks discussion around our content areas.",
-        
-        "friday_feature": "Highlight something interesting about our product, team, or process that shows what makes us unique.",
-        
-        "weekend_insight": "Share a weekend-appropriate insight or reflection that resonates with our audience while staying on-brand.",
-        
-        "product_highlight": "Showcase one of our products/services in an engaging, non-salesy way that highlights the value it provides.",
-        
-        "behind_the_scenes": "Give a behind-the-scenes look at our company that humanizes our brand and builds connection.",
-        
-        "customer_value": "Focus on a specific way we help our customers succeed, told through the lens of their needs.",
-        
-        "industry_insight": "Share a relevant industry trend or insight that demonstrates our expertise and adds value."
-    }
-    
-    user_prompt = themes.get(theme, themes["tuesday_tip"])
+    user_prompt = _THEMES.get(theme, _THEMES["tuesday_tip"])
     user_prompt += "\n\nTweet text (under 280 characters):"
     
     return system_prompt, user_prompt
@@ -308,27 +400,10 @@ def build_action_post_prompt(brand_data: dict, action_data: dict) -> tuple[str,
     context = action_data.get("context", "")
     tone = action_data.get("tone", "engaging")
     
-    # Action type specific prompt styles
-    action_prompts = {
-        "announcement": "Create an exciting announcement tweet that grabs attention and clearly communicates the news. Make it newsworthy and shareable.",
-        
-        "engagement": "Create a tweet that encourages replies and interaction. Ask a thought-provoking question or start a discussion that your audience will want to engage with.",
-        
-        "excitement": "Build hype and excitement! Create anticipation with a teaser or behind-the-scenes content that makes people curious and eager to learn more.",
-        
-        "promotion": "Promote this offering in a compelling way that drives action. Highlight the value and benefits without being too salesy. Create urgency if appropriate.",
-        
-        "education": "Share valuable knowledge in a clear, helpful way. Teach something useful that your audience can apply. Be the expert they trust.",
-        
-        "community": "Celebrate community wins, share customer stories, or highlight your audience. Build connection and make people feel part of something bigger.",
-        
-        "metrics": "Share this achievement or milestone in a way that's impressive yet authentic. Make it relatable and show the journey, not just the destination."
-    }
-    
-    prompt_style = action_prompts.get(action_type, action_prompts["announcement"])
+    prompt_style = _ACTION_PROMPTS.get(action_type, _ACTION_PROMPTS["announcement"])
     
     # Build comprehensive system prompt with action context
-    system_prompt, _, url_suffix = build_post_generation_prompt(brand_data, tone=tone)
+    system_prompt, url_suffix, _ = _build_system_prompt(brand_data, tone)
     
     # Build user prompt with action details
     user_prompt = f"""Generate a tweet for this content action:
@@ -7,6 +7,11 @@ from supabase import create_client, Client
 from app.config import settings
 
 
+# Prompts only use the start of scraped_insights; trim once on load
+# rather than on every prompt render
+MAX_INSIGHTS_CHARS = 500
+
+
 def get_supabase() -> Client:
     """Get Supabase client."""
     return create_client(
@@ -48,6 +53,7 @@ async def get_brand_context(brand_id: str) -> Optional[dict]:
             return None
         
         brand = result.data[0]
+        insights = brand.get("scraped_insights")
         
         # Build comprehensive context
         context = {
@@ -60,7 +66,7 @@ async def get_brand_context(brand_id: str) -> Optional[dict]:
             # Website & scraped data
             "website": brand.get("website"),
             "scraped_summary": brand.get("scraped_summary"),
-            "scraped_insights": brand.get("scraped_insights"),
+            "scraped_insights": insights[:MAX_INSIGHTS_CHARS] if insights else insights,
             
             # Business details
             "business_type": brand.get("business_type"),
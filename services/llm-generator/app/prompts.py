@@ -2,6 +2,11 @@
 Persona prompts for different reply styles.
 """
 
+import functools
+import json
+import re
+from itertools import islice
+
 PERSONAS = {
     "normal": """You are a helpful and friendly brand representative. 
 Your goal is to engage authentically, provide value, and build relationships.
@@ -24,10 +29,74 @@ Push boundaries while staying respectful."""
 }
 
 
+# Low-value phrases that make a short reply "too generic"
+_GENERIC_PHRASES = (
+    "thank you for sharing",
+    "interesting post",
+    "great point",
+    "i agree",
+)
+
+# Single scan over the reply instead of one substring search per phrase
+_GENERIC_PHRASE_RE = re.compile("|".join(re.escape(p) for p in _GENERIC_PHRASES))
+
+
+# brand_agent fields that feed the system prompt
+_PROMPT_FIELDS = (
+    "brand_name",
+    "name",
+    "description",
+    "products",
+    "unique_value",
+    "brand_values",
+    "communication_style",
+    "personality",
+    "target_market",
+    "content_pillars",
+    "differentiation",
+    "scraped_insights",
+    "question_responses",
+)
+
+
+# Optional brand sections, in prompt order. A section is rendered only
+# when its field is set; missing ones format to "" via _Defaulting.
+_BRAND_SECTIONS = {
+    "description": "About us: {}\n",
+    "products": "Products/Services: {}\n",
+    "unique_value": "What makes us unique: {}\n",
+    "brand_values": "Our values: {}\n",
+    "communication_style": "=== COMMUNICATION STYLE ===\n{}\n\n",
+    "personality": "Personality: {}\n\n",
+    "target_market": "=== TARGET AUDIENCE ===\n{}\n\n",
+    "content_pillars": "=== CONTENT FOCUS ===\n{}\n\n",
+    "differentiation": "=== HOW WE STAND OUT ===\n{}\n\n",
+    "scraped_insights": "=== KEY INSIGHTS ===\n{}\n\n",
+}
+
+_BRAND_BLOCK_TEMPLATE = (
+    "=== BRAND IDENTITY ===\n"
+    "Brand: {brand_name}\n"
+    "{description}{products}{unique_value}{brand_values}\n"
+    "{communication_style}{personality}{target_market}{content_pillars}"
+    "{differentiation}{scraped_insights}{question_responses}"
+)
+
+
+class _Defaulting(dict):
+    """format_map mapping that renders unset sections as empty strings."""
+    
+    def __missing__(self, key):
+        return ""
+
+
 def build_system_prompt(persona: str, brand_context: dict) -> str:
     """
     Build the system prompt for the LLM using FULL brand context.
     
+    Prompts are memoized per (persona, brand fields); an edited brand
+    produces a different key, so there is nothing to invalidate.
+    
     Args:
         persona: Persona type (normal/smart/technical/unhinged)
         brand_context: Complete brand context from brand_agent table
@@ -35,78 +104,49 @@ def build_system_prompt(persona: str, brand_context: dict) -> str:
     Returns:
         System prompt string
     """
-    persona_desc = PERSONAS.get(persona, PERSONAS["normal"])
+    brand_json = json.dumps(
+        {k: brand_context[k] for k in _PROMPT_FIELDS if k in brand_context},
+        default=str
+    )
+    return _build_system_prompt_cached(persona, brand_json)
+
+
+@functools.lru_cache(maxsize=512)
+def _build_brand_identity_block(brand_json: str) -> str:
+    """
+    Render the brand sections of the system prompt.
     
-    # Extract key brand info
-    brand_name = brand_context.get("brand_name") or brand_context.get("name", "Our brand")
-    description = brand_context.get("description", "")
+    Doesn't depend on persona, so one render serves every persona for a brand.
+    """
+    brand_context = json.loads(brand_json)
+    g = brand_context.get
+    
+    sections = _Defaulting(
+        (field, section.format(value))
+        for field, section in _BRAND_SECTIONS.items()
+        if (value := g(field))
+    )
+    sections["brand_name"] = g("brand_name") or g("name", "Our brand")
+    
+    # Add any question responses (JSONB field), limited to 5
+    question_responses = g("question_responses")
+    if question_responses and isinstance(question_responses, dict):
+        sections["question_responses"] = "=== ADDITIONAL CONTEXT ===\n" + "".join(
+            f"- {key}: {value}\n"
+            for key, value in islice(question_responses.items(), 5)
+            if value
+        ) + "\n"
     
-    # Build comprehensive prompt
-    prompt = f"""{persona_desc}
+    return _BRAND_BLOCK_TEMPLATE.format_map(sections)
 
-=== BRAND IDENTITY ===
-Brand: {brand_name}
-"""
+
+@functools.lru_cache(maxsize=512)
+def _build_system_prompt_cached(persona: str, brand_json: str) -> str:
+    """Render the system prompt from serialized brand fields."""
+    persona_desc = PERSONAS.get(persona, PERSONAS["normal"])
     
-    # Add description
-    if description:
-        prompt += f"About us: {description}\n"
-    
-    # Add products/services
-    products = brand_context.get("products")
-    if products:
-        prompt += f"Products/Services: {products}\n"
-    
-    # Add unique value proposition
-    unique_value = brand_context.get("unique_value")
-    if unique_value:
-        prompt += f"What makes us unique: {unique_value}\n"
-    
-    # Add brand values
-    brand_values = brand_context.get("brand_values")
-    if brand_values:
-        prompt += f"Our values: {brand_values}\n"
-    
-    prompt += "\n"
-    
-    # Add communication style
-    communication_style = brand_context.get("communication_style")
-    if communication_style:
-        prompt += f"=== COMMUNICATION STYLE ===\n{communication_style}\n\n"
-    
-    # Add personality
-    personality = brand_context.get("personality")
-    if personality:
-        prompt += f"Personality: {personality}\n\n"
-    
-    # Add target market context
-    target_market = brand_context.get("target_market")
-    if target_market:
-        prompt += f"=== TARGET AUDIENCE ===\n{target_market}\n\n"
-    
-    # Add content pillars (what topics to focus on)
-    content_pillars = brand_context.get("content_pillars")
-    if content_pillars:
-        prompt += f"=== CONTENT FOCUS ===\n{content_pillars}\n\n"
-    
-    # Add differentiation
-    differentiation = brand_context.get("differentiation")
-    if differentiation:
-        prompt += f"=== HOW WE STAND OUT ===\n{differentiation}\n\n"
-    
-    # Add scraped insights (if available)
-    insights = brand_context.get("scraped_insights")
-    if insights:
-        prompt += f"=== KEY INSIGHTS ===\n{insights[:500]}\n\n"  # Limit length
-    
-    # Add any question responses (JSONB field)
-    question_responses = brand_context.get("question_responses")
-    if question_responses and isinstance(question_responses, dict):
-        prompt += "=== ADDITIONAL CONTEXT ===\n"
-        for key, value in list(question_responses.items())[:5]:  # Limit to 5
-            if value:
-                prompt += f"- {key}: {value}\n"
-        prompt += "\n"
+    # Build comprehensive prompt
+    prompt = f"{persona_desc}\n\n" + _build_brand_identity_block(brand_json)
     
     # Add important rules
     prompt += """=== REPLY GUIDELINES ===
@@ -168,15 +208,9 @@ def validate_reply(reply: str, max_length: int = 200) -> tuple[bool, str]:
     if len(reply) > max_length:
         return False, f"Reply too long ({len(reply)} > {max_length})"
     
-    # Check for generic/low-value replies
-    generic_phrases = [
-        "thank you for sharing",
-        "interesting post",
-        "great point",
-        "i agree"
-    ]
-    
-    if any(phrase in reply.lower() for phrase in generic_phrases) and len(reply) < 50:
+    # Check for generic/low-value replies (only short replies can be
+    # too generic, so skip lowercasing and scanning longer ones)
+    if len(reply) < 50 and _GENERIC_PHRASE_RE.search(reply.lower()):
         return False, "Reply too generic"
     
     return True, ""
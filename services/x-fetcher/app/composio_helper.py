@@ -5,31 +5,98 @@ We use Composio ONLY for OAuth token management.
 Actual X API calls are made directly.
 """
 
-from typing import Optional
+import asyncio
+import logging
+import time
+from datetime import datetime
+from typing import Dict, Optional, Tuple
 from composio import Composio, Action
 
 from app.config import settings
 
 
+logger = logging.getLogger(__name__)
+
+# Stop serving a cached token this many seconds before X expires it
+TOKEN_EXPIRY_MARGIN = 60
+
+
 class ComposioTokenManager:
     """Manage OAuth tokens via Composio."""
     
     def __init__(self):
         self.composio = Composio(api_key=settings.composio_api_key)
+        
+        # brand_id -> (access_token, user_id, monotonic expiry)
+        self._token_cache: Dict[str, Tuple[str, Optional[str], float]] = {}
+        self.token_ttl = settings.composio_token_ttl_seconds
+        
+        # brand_id -> lookup in progress, shared by concurrent cache misses
+        self._inflight: Dict[str, asyncio.Task] = {}
     
-    async def get_x_token(self, brand_id: str) -> Optional[str]:
+    async def get_token_and_user_id(
+        self,
+        brand_id: str
+    ) -> Tuple[Optional[str], Optional[str]]:
         """
-        Get X API access token for a brand.
+        Get the X access token and user ID for a brand.
         
-        Composio manages the OAuth flow and token refresh.
-        We just retrieve the token and use it for direct X API calls.
+        Both come from the same Composio connection, so one lookup covers
+        them. Results are cached per brand for `token_ttl` seconds, or
+        until shortly before the token expires if that is sooner, and
+        concurrent misses for the same brand share a single lookup.
         
         Args:
             brand_id: Brand identifier (used as entity_id in Composio)
             
         Returns:
-            Access token or None if not connected
+            (access_token, user_id); access_token is None if not connected
         """
+        cached = self._token_cache.get(brand_id)
+        if cached and cached[2] > time.monotonic():
+            return cached[0], cached[1]
+        
+        task = self._inflight.get(brand_id)
+        if task is None:
+            task = asyncio.create_task(self._load_connection(brand_id))
+            self._inflight[brand_id] = task
+            task.add_done_callback(lambda _: self._inflight.pop(brand_id, None))
+        
+        # Shielded so one caller being cancelled doesn't cancel the others' lookup
+        return await asyncio.shield(task)
+    
+    async def _load_connection(self, brand_id: str) -> Tuple[Optional[str], Optional[str]]:
+        """Fetch a brand's connection from Composio and cache it."""
+        # The Composio SDK is synchronous; keep its HTTP calls off the event loop
+        access_token, user_id, expires_in = await asyncio.to_thread(
+            self._fetch_connection, brand_id
+        )
+        
+        ttl = self.token_ttl
+        if expires_in is not None:
+            ttl = min(ttl, expires_in - TOKEN_EXPIRY_MARGIN)
+        if access_token and ttl > 0:
+            self._token_cache[brand_id] = (
+                access_token,
+                user_id,
+                time.monotonic() + ttl
+            )
+        return access_token, user_id
+    
+    def invalidate(self, brand_id: str):
+        """
+        Drop a brand's cached token.
+        
+        Call this when X rejects the token (401) so the next request
+        fetches a fresh one from Composio.
+        """
+        self._token_cache.pop(brand_id, None)
+    
+    def _fetch_connection(
+        self,
+        brand_id: str
+    ) -> Tuple[Optional[str], Optional[str], Optional[float]]:
+        """Read the access token and user ID from the brand's Twitter connection."""
         try:
             # Get entity (brand) from Composio
             entity = self.composio.get_entity(id=brand_id)
@@ -38,18 +105,62 @@ class ComposioTokenManager:
             connection = entity.get_connection(app="twitter")
             
             if not connection:
-                print(f"No Twitter connection found for brand: {brand_id}")
-                return None
+                logger.warning("No Twitter connection found for brand: %s", brand_id)
+                return None, None, None
             
-            # Get access token (Composio handles refresh automatically)
-            access_token = connection.access_token
+            # Access token (Composio handles refresh automatically) and
+            # user info from connection metadata
+            return (
+                connection.access_token,
+                connection.metadata.get("user_id"),
+                self._seconds_until_expiry(connection)
+            )
             
-            return access_token
-            
-        except Exception as e:
-            print(f"Error getting token for brand {brand_id}: {e}")
+        except Exception:
+            logger.exception("Error getting token for brand %s", brand_id)
+            return None, None, None
+    
+    @staticmethod
+    def _seconds_until_expiry(connection) -> Optional[float]:
+        """
+        Remaining lifetime of the connection's access token.
+        
+        Composio may hand back a token minted well before this lookup, so
+        the cache can't assume a full lifetime. Returns None if the
+        connection doesn't report an expiry.
+        """
+        expires_at = getattr(connection, "expires_at", None)
+        if expires_at is None:
+            expires_at = (connection.metadata or {}).get("expires_at")
+        if expires_at is None:
+            return None
+        
+        try:
+            if isinstance(expires_at, datetime):
+                expires_at = expires_at.timestamp()
+            elif isinstance(expires_at, str):
+                expires_at = datetime.fromisoformat(expires_at.replace("Z", "+00:00")).timestamp()
+            return float(expires_at) - time.time()
+        except (TypeError, ValueError):
+            logger.warning("Unrecognised token expiry %r; using default TTL", expires_at)
             return None
     
+    async def get_x_token(self, brand_id: str) -> Optional[str]:
+        """
+        Get X API access token for a brand.
+        
+        Composio manages the OAuth flow and token refresh.
+        We just retrieve the token and use it for direct X API calls.
+        
+        Args:
+            brand_id: Brand identifier (used as entity_id in Composio)
+            
+        Returns:
+            Access token or None if not connected
+        """
+        access_token, _ = await self.get_token_and_user_id(brand_id)
+        return access_token
+    
     async def get_user_id(self, brand_id: str) -> Optional[str]:
         """
         Get the X user ID for a brand.
@@ -60,22 +171,10 @@ class ComposioTokenManager:
         Returns:
             X user ID or None
         """
-        try:
-            entity = self.composio.get_entity(id=brand_id)
-            connection = entity.get_connection(app="twitter")
-            
-            if not connection:
-                return None
-            
-            # Get user info from connection metadata
-            # This might be stored differently depending on Composio's structure
-            return connection.metadata.get("user_id")
-            
-        except Exception as e:
-            print(f"Error getting user ID for brand {brand_id}: {e}")
-            return None
+        _, user_id = await self.get_token_and_user_id(brand_id)
+        return user_id
     
-    def is_connected(self, brand_id: str) -> bool:
+    async def is_connected(self, brand_id: str) -> bool:
         """
         Check if a brand has Twitter connected via Composio.
         
@@ -85,6 +184,10 @@ class ComposioTokenManager:
         Returns:
             True if connected
         """
+        return await asyncio.to_thread(self._is_connected_sync, brand_id)
+    
+    def _is_connected_sync(self, brand_id: str) -> bool:
+        """Blocking connection check run in a worker thread."""
         try:
             entity = self.composio.get_entity(id=brand_id)
             connection = entity.get_connection(app="twitter")
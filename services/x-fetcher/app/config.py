@@ -14,6 +14,7 @@ class Settings(BaseSettings):
     
     # Composio (for OAuth token management)
     composio_api_key: str
+    composio_token_ttl_seconds: int = 3300  # Cache tokens just under 1 hour
     
     # X API
     x_api_base: str = "https://api.x.com/2"
@@ -24,6 +25,7 @@ class Settings(BaseSettings):
     # Polling configuration
     poll_interval_seconds: int = 60
     max_results_per_poll: int = 25
+    max_pages_per_fetch: int = 3  # Pages per fetch request (next page is prefetched)
     
     # Rate limiting
     mentions_rate_limit: int = 450  # per 15 min
@@ -33,6 +35,9 @@ class Settings(BaseSettings):
     supabase_url: str
     supabase_service_key: str
     
+    # Database pool (connections opened and warmed at startup)
+    expected_concurrency: int = 4
+    
     # LLM Generator endpoint
     llm_generator_url: str = "http://localhost:8300"
     
@@ -4,17 +4,49 @@ Database operations for fetching brand configurations from Supabase.
 This is the KEY part - getting brand keywords, watched accounts, and filters.
 """
 
+import asyncio
+import logging
 import asyncpg
-from typing import List, Dict, Optional
+from datetime import datetime
+from typing import List, Dict, Optional, Tuple
 
 from app.config import settings
 
 
+logger = logging.getLogger(__name__)
+
+# Buffered candidate logging: flush when this many rows are queued,
+# or every CANDIDATE_FLUSH_INTERVAL seconds, whichever comes first.
+CANDIDATE_BATCH_SIZE = 50
+CANDIDATE_FLUSH_INTERVAL = 0.25
+
+# pool.close() waits indefinitely for checked-out connections; after this
+# many seconds the pool is terminated instead so shutdown can't hang.
+POOL_CLOSE_TIMEOUT = 10.0
+
+INSERT_CANDIDATE_SQL = """
+    INSERT INTO candidate_event (
+        brand_id,
+        platform,
+        source_ref,
+        proposed_text,
+        context_url,
+        risk_flags,
+        relevance_score,
+        state,
+        created_at
+    ) VALUES ($1, $2, $3, $4, $5, $6, $7, 'new', NOW())
+"""
+
+
 class BrandDatabase:
     """Fetch brand configurations from Supabase."""
     
     def __init__(self):
         self.pool: Optional[asyncpg.Pool] = None
+        self._candidate_buffer: List[Tuple] = []
+        self._flush_task: Optional[asyncio.Task] = None
+        self._flush_stop: Optional[asyncio.Event] = None
     
     async def connect(self):
         """Connect to Supabase PostgreSQL."""
@@ -23,28 +55,87 @@ class BrandDatabase:
             # Format: https://xxx.supabase.co
             project_ref = settings.supabase_url.split('//')[1].split('.')[0]
             
+            # Keep enough connections open for steady-state concurrency so
+            # the first burst doesn't pay TCP+TLS+auth handshakes inline
+            min_size = max(2, settings.expected_concurrency)
+            
             self.pool = await asyncpg.create_pool(
                 host=f"db.{project_ref}.supabase.co",
                 port=5432,
                 user="postgres",
                 password="your_supabase_password",  # Set via env: SUPABASE_DB_PASSWORD
                 database="postgres",
-                min_size=1,
-                max_size=10
+                min_size=min_size,
+                max_size=max(10, min_size),
+                command_timeout=5,
+                max_inactive_connection_lifetime=300
             )
+            
+            await asyncio.gather(*(self._warm() for _ in range(min_size)))
+    
+    async def _warm(self):
+        """Check out a pooled connection and make one round-trip on it."""
+        async with self.pool.acquire() as conn:
+            await conn.fetchval("SELECT 1")
     
     async def close(self):
         """Close database connection."""
+        if self._flush_task:
+            # Stop the flusher rather than cancelling it: a cancelled flush
+            # rolls back rows that were already taken off the buffer
+            self._flush_stop.set()
+            await self._flush_task
+        
         if self.pool:
-            await self.pool.close()
+            # Don't drop candidates that were queued but not yet written
+            await self.flush_candidates()
+            try:
+                await asyncio.wait_for(self.pool.close(), POOL_CLOSE_TIMEOUT)
+            except asyncio.TimeoutError:
+                logger.warning("Pool close timed out; terminating connections")
+                self.pool.terminate()
             self.pool = None
     
-    async def get_active_brands(self) -> List[Dict]:
+    async def list_active_brand_ids(self) -> List[asyncpg.Record]:
+        """
+        Cheap listing of active brands for scheduler ticks.
+        
+        Skips the keyword/account arrays and brand text; fetch those per
+        brand with get_brand_config when a brand is actually processed.
+        
+        Returns:
+            List of records with id, mode and daily_reply_cap
+        """
+        if not self.pool:
+            await self.connect()
+        
+        query = """
+            SELECT id, mode, daily_reply_cap
+            FROM brand_agent
+            WHERE is_active = true
+        """
+        
+        try:
+            async with self.pool.acquire() as conn:
+                return await conn.fetch(query)
+        except Exception:
+            logger.exception("Error listing active brands")
+            return []
+    
+    async def get_active_brands(
+        self,
+        updated_since: Optional[datetime] = None
+    ) -> List[asyncpg.Record]:
         """
         Get all active brands that need monitoring.
         
+        Args:
+            updated_since: Only return brands changed after this time
+                (for incremental polling)
+        
         Returns:
-            List of brand dicts with configuration
+            List of brand records (index by column name, e.g. row["id"];
+            no per-row dict copy is made)
         """
         if not self.pool:
             await self.connect()
@@ -65,13 +156,17 @@ class BrandDatabase:
             FROM brand_agent
             WHERE is_active = true
         """
+        args = []
+        
+        if updated_since:
+            query += "    AND updated_at > $1\n"
+            args.append(updated_since)
         
         try:
             async with self.pool.acquire() as conn:
-                rows = await conn.fetch(query)
-                return [dict(row) for row in rows]
-        except Exception as e:
-            print(f"Error fetching active brands: {e}")
+                return await conn.fetch(query, *args)
+        except Exception:
+            logger.exception("Error fetching active brands")
             return []
     
     async def get_brand_config(self, brand_id: str) -> Optional[Dict]:
@@ -114,8 +209,8 @@ class BrandDatabase:
             async with self.pool.acquire() as conn:
                 row = await conn.fetchrow(query, brand_id)
                 return dict(row) if row else None
-        except Exception as e:
-            print(f"Error fetching brand {brand_id}: {e}")
+        except Exception:
+            logger.exception("Error fetching brand %s", brand_id)
             return None
     
     async def log_candidate(
@@ -146,20 +241,7 @@ class BrandDatabase:
         if not self.pool:
             await self.connect()
         
-        query = """
-            INSERT INTO candidate_event (
-                brand_id,
-                platform,
-                source_ref,
-                proposed_text,
-                context_url,
-                risk_flags,
-                relevance_score,
-                state,
-                created_at
-            ) VALUES ($1, $2, $3, $4, $5, $6, $7, 'new', NOW())
-            RETURNING id
-        """
+        query = INSERT_CANDIDATE_SQL + "RETURNING id"
         
         try:
             async with self.pool.acquire() as conn:
@@ -174,9 +256,89 @@ class BrandDatabase:
                     relevance_score
                 )
                 return event_id
-        except Exception as e:
-            print(f"Error logging candidate: {e}")
+        except Exception:
+            logger.exception("Error logging candidate for brand %s", brand_id)
             return None
+    
+    async def log_candidates_bulk(self, rows: List[Tuple]) -> int:
+        """
+        Insert many candidate events in a single round-trip.
+        
+        Use this instead of log_candidate when the event IDs aren't needed.
+        
+        Args:
+            rows: Tuples of (brand_id, platform, source_ref, proposed_text,
+                  context_url, risk_flags, relevance_score)
+            
+        Returns:
+            Number of rows written
+        """
+        if not rows:
+            return 0
+        
+        if not self.pool:
+            await self.connect()
+        
+        try:
+            async with self.pool.acquire() as conn:
+                async with conn.transaction():
+                    await conn.executemany(INSERT_CANDIDATE_SQL, rows)
+                return len(rows)
+        except Exception:
+            logger.exception("Error logging %d candidates", len(rows))
+            return 0
+    
+    async def queue_candidate(
+        self,
+        brand_id: str,
+        platform: str,
+        source_ref: str,
+        proposed_text: str,
+        context_url: str,
+        risk_flags: List[str],
+        relevance_score: float
+    ):
+        """
+        Queue a candidate event for the next bulk insert.
+        
+        Rows are written by log_candidates_bulk once CANDIDATE_BATCH_SIZE
+        rows are queued, or by a background flusher that runs while the
+        buffer is non-empty.
+        """
+        self._candidate_buffer.append((
+            brand_id,
+            platform,
+            source_ref,
+            proposed_text,
+            context_url,
+            risk_flags,
+            relevance_score
+        ))
+        
+        if len(self._candidate_buffer) >= CANDIDATE_BATCH_SIZE:
+            await self.flush_candidates()
+        elif not self._flush_task:
+            self._flush_stop = asyncio.Event()
+            self._flush_task = asyncio.create_task(self._flush_candidates_loop())
+    
+    async def flush_candidates(self) -> int:
+        """Write all queued candidate events."""
+        if not self._candidate_buffer:
+            return 0
+        
+        rows, self._candidate_buffer = self._candidate_buffer, []
+        return await self.log_candidates_bulk(rows)
+    
+    async def _flush_candidates_loop(self):
+        """Drain the candidate buffer until it is empty or close() is called."""
+        while self._candidate_buffer and not self._flush_stop.is_set():
+            try:
+                await asyncio.wait_for(self._flush_stop.wait(), CANDIDATE_FLUSH_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+            await self.flush_candidates()
+        
+        self._flush_task = None
 
 
 # Global instance
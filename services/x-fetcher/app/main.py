@@ -11,36 +11,53 @@ SIMPLIFIED: No Redis, no polling scheduler (for now)
 Just expose endpoints to manually trigger fetching.
 """
 
-from contextlib import asynccontextmanager
-from typing import List, Dict
+import asyncio
+import logging
+import math
+from contextlib import AsyncExitStack, asynccontextmanager
+from typing import List, Dict, Tuple
 
-from fastapi import FastAPI, HTTPException
+import httpx
+from fastapi import FastAPI, HTTPException, Request, Response
+from fastapi.responses import JSONResponse
 from pydantic import BaseModel
 
 from app.config import settings
 from app.composio_helper import token_manager
-from app.x_api import x_api
-from app.filters import tweet_filter
+from app.x_api import RateLimitedError, x_api
+from app.filters import brand_filter_inputs, tweet_filter
 from app.database import brand_db
 
 
+logger = logging.getLogger(__name__)
+
+# Brands fetched at once by the batch endpoint
+BATCH_FETCH_CONCURRENCY = 10
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Application lifespan manager."""
-    print("🚀 Starting X Fetcher Service...")
-    
-    # Initialize database connection
-    await brand_db.connect()
-    print("✅ Database connected")
+    logging.basicConfig(level=logging.INFO)
+    logger.info("🚀 Starting X Fetcher Service...")
     
-    print(f"Server ready on port {settings.port}")
-    
-    yield
+    # Cleanup callbacks run in reverse order on exit, including when startup
+    # fails part-way or the server is stopped with an exception
+    async with AsyncExitStack() as stack:
+        stack.push_async_callback(x_api.aclose)
+        
+        # Initialize database connection
+        await brand_db.connect()
+        stack.push_async_callback(brand_db.close)
+        logger.info("✅ Database connected")
+        
+        logger.info("Server ready on port %s", settings.port)
+        
+        yield
+        
+        logger.info("Shutting down...")
     
-    # Cleanup
-    print("Shutting down...")
-    await brand_db.close()
-    print("Goodbye!")
+    logger.info("Goodbye!")
 
 
 app = FastAPI(
@@ -65,6 +82,58 @@ class FetchResponse(BaseModel):
     candidates: List[Dict]
 
 
+class BatchFetchRequest(BaseModel):
+    """Request to fetch tweets for several brands."""
+    brand_ids: List[str]
+
+
+class BatchFetchResponse(BaseModel):
+    """Per-brand results, plus errors for brands that could not be fetched."""
+    results: List[FetchResponse]
+    errors: Dict[str, str]
+
+
+@app.exception_handler(RateLimitedError)
+async def rate_limited_handler(request: Request, exc: RateLimitedError):
+    """Report an exhausted X API rate-limit window as 429 with Retry-After."""
+    return JSONResponse(
+        status_code=429,
+        content={"detail": str(exc)},
+        headers={"Retry-After": str(math.ceil(exc.retry_after))}
+    )
+
+
+def _json_response(model: BaseModel) -> Response:
+    """
+    Serialize a response model straight to JSON bytes.
+    
+    model_dump_json runs in pydantic-core, skipping FastAPI's re-validation
+    and the extra dict -> json.dumps pass for large candidate lists. The
+    route's response_model still documents the schema.
+    """
+    return Response(content=model.model_dump_json(), media_type="application/json")
+
+
+def _build_candidates(
+    tweets: List[Dict],
+    results: List[Tuple[bool, List[str], float]]
+) -> List[Dict]:
+    """Build the candidate payload for tweets that passed the filter."""
+    return [
+        {
+            "tweet_id": tweet.get("id"),
+            "text": tweet.get("text"),
+            "author_id": tweet.get("author_id"),
+            "conversation_id": tweet.get("conversation_id"),
+            "created_at": tweet.get("created_at"),
+            "relevance_score": score,
+            "url": f"https://x.com/user/status/{tweet.get('id')}"
+        }
+        for tweet, (should_respond, _, score) in zip(tweets, results)
+        if should_respond
+    ]
+
+
 @app.get("/")
 async def root():
     """Health check endpoint."""
@@ -77,6 +146,11 @@ async def root():
 
 @app.post("/fetch/mentions", response_model=FetchResponse)
 async def fetch_mentions(request: FetchRequest):
+    """Fetch mentions for a brand and filter for relevance."""
+    return _json_response(await _fetch_mentions(request.brand_id))
+
+
+async def _fetch_mentions(brand_id: str) -> FetchResponse:
     """
     Fetch mentions for a brand and filter for relevance.
     
@@ -87,74 +161,76 @@ async def fetch_mentions(request: FetchRequest):
     4. Filter tweets for relevance
     5. Return good candidates
     """
-    brand_id = request.brand_id
+    # 1 + 2. Brand config (database) and X access token + user ID (Composio)
+    # come from independent backends, so fetch them concurrently
+    brand_config, (access_token, user_id) = await asyncio.gather(
+        brand_db.get_brand_config(brand_id),
+        token_manager.get_token_and_user_id(brand_id)
+    )
     
-    # 1. Get brand configuration
-    brand_config = await brand_db.get_brand_config(brand_id)
     if not brand_config:
         raise HTTPException(
             status_code=404,
             detail=f"Brand {brand_id} not found or not active"
         )
     
-    # 2. Get X access token from Composio
-    access_token = await token_manager.get_x_token(brand_id)
     if not access_token:
         raise HTTPException(
             status_code=400,
             detail=f"No X account connected for brand {brand_id}. Connect via Composio first."
         )
     
-    # Get user ID (needed for mentions endpoint)
-    user_id = await token_manager.get_user_id(brand_id)
     if not user_id:
         raise HTTPException(
             status_code=400,
             detail="Could not get X user ID for brand"
         )
     
-    # 3. Fetch mentions from X API
-    response = await x_api.get_mentions(
-        access_token=access_token,
-        user_id=user_id,
-        since_id=None  # TODO: Track last_id later
+    keywords_lower, watched_accounts = brand_filter_inputs(
+        tuple(brand_config.get("keywords") or []),
+        tuple(brand_config.get("watched_accounts") or [])
     )
     
-    tweets = response.get("data", [])
-    print(f"📥 Fetched {len(tweets)} mentions for {brand_id}")
+    # 3 + 4. Fetch mentions from X API, filtering each page while the
+    # next one downloads
+    tweets = []
+    results = []
+    try:
+        async for page in x_api.iter_pages(
+            lambda token: x_api.get_mentions(
+                access_token=access_token,
+                user_id=user_id,
+                since_id=None,  # TODO: Track last_id later
+                pagination_token=token
+            )
+        ):
+            tweets.extend(page)
+            results.extend(tweet_filter.should_respond_batch(
+                tweets=page,
+                keywords_lower=keywords_lower,
+                whitelisted_authors=watched_accounts,
+                min_relevance_score=0.5
+            ))
+    except httpx.HTTPStatusError as e:
+        if e.response.status_code == 401:
+            # X rejected the cached token; make the next request fetch a fresh one
+            token_manager.invalidate(brand_id)
+        raise
     
-    # 4. Filter tweets
-    candidates = []
-    failed_count = 0
+    logger.info("📥 Fetched %d mentions for %s", len(tweets), brand_id)
     
-    keywords = brand_config.get("keywords", [])
-    watched_accounts = brand_config.get("watched_accounts", [])
-    
-    for tweet in tweets:
-        # Check if should respond
-        should_respond, risk_flags, score = tweet_filter.should_respond(
-            tweet=tweet,
-            keywords=keywords,
-            whitelisted_authors=watched_accounts,
-            min_relevance_score=0.5
-        )
-        
-        if should_respond:
-            # Good candidate!
-            candidates.append({
-                "tweet_id": tweet.get("id"),
-                "text": tweet.get("text"),
-                "author_id": tweet.get("author_id"),
-                "created_at": tweet.get("created_at"),
-                "relevance_score": score,
-                "url": f"https://x.com/user/status/{tweet.get('id')}"
-            })
-        else:
-            failed_count += 1
-            print(f"❌ Filtered out tweet: {risk_flags}, score: {score}")
-    
-    print(f"✅ {len(candidates)} candidates passed filter")
-    print(f"❌ {failed_count} tweets filtered out")
+    candidates = _build_candidates(tweets, results)
+    failed_count = len(tweets) - len(candidates)
+    
+    if logger.isEnabledFor(logging.DEBUG):
+        for should_respond, risk_flags, score in results:
+            if not should_respond:
+                logger.debug("❌ Filtered out tweet: %s, score: %s", risk_flags, score)
+    
+    logger.info(
+        "✅ %d candidates passed filter, ❌ %d tweets filtered out",
+        len(candidates), failed_count
+    )
     
     return FetchResponse(
         brand_id=brand_id,
@@ -165,6 +241,44 @@ async def fetch_mentions(request: FetchRequest):
     )
 
 
+@app.post("/fetch/mentions/batch", response_model=BatchFetchResponse)
+async def fetch_mentions_batch(request: BatchFetchRequest):
+    """
+    Fetch and filter mentions for several brands concurrently.
+    
+    Each brand goes through the same steps as /fetch/mentions; up to
+    BATCH_FETCH_CONCURRENCY brands are in flight at once, sharing the
+    database pool and the X API connection pool.
+    """
+    semaphore = asyncio.Semaphore(BATCH_FETCH_CONCURRENCY)
+    
+    async def fetch_one(brand_id: str):
+        async with semaphore:
+            try:
+                return await _fetch_mentions(brand_id), None
+            except HTTPException as e:
+                return None, str(e.detail)
+            except RateLimitedError as e:
+                return None, str(e)
+            except httpx.HTTPError as e:
+                # e.g. a revoked token (401) or an X outage for this brand;
+                # keep the other brands' results
+                logger.warning("X API error fetching mentions for %s: %s", brand_id, e)
+                return None, f"X API error: {e}"
+    
+    brand_ids = list(dict.fromkeys(request.brand_ids))
+    outcomes = await asyncio.gather(*(fetch_one(brand_id) for brand_id in brand_ids))
+    
+    return _json_response(BatchFetchResponse(
+        results=[result for result, _ in outcomes if result is not None],
+        errors={
+            brand_id: error
+            for brand_id, (_, error) in zip(brand_ids, outcomes)
+            if error is not None
+        }
+    ))
+
+
 @app.post("/fetch/search", response_model=FetchResponse)
 async def fetch_search(request: FetchRequest):
     """
@@ -180,8 +294,13 @@ async def fetch_search(request: FetchRequest):
     """
     brand_id = request.brand_id
     
-    # 1. Get brand configuration
-    brand_config = await brand_db.get_brand_config(brand_id)
+    # 1 + 3. Brand config (database) and X access token (Composio) come from
+    # independent backends, so fetch them concurrently
+    brand_config, (access_token, _) = await asyncio.gather(
+        brand_db.get_brand_config(brand_id),
+        token_manager.get_token_and_user_id(brand_id)
+    )
+    
     if not brand_config:
         raise HTTPException(
             status_code=404,
@@ -202,75 +321,69 @@ async def fetch_search(request: FetchRequest):
     
     # Build optimized query
     query = x_api.build_search_query(
-        keywords=keywords,
+        keywords=tuple(keywords),
         brand_handle=brand_handle,
         exclude_retweets=True,
         exclude_replies=False,  # We want to see conversations
         language="en"
     )
     
-    print(f"🔍 Search query: {query}")
+    logger.debug("🔍 Search query: %s", query)
     
-    # 3. Get X access token from Composio
-    access_token = await token_manager.get_x_token(brand_id)
+    # 3. Require a connected X account
     if not access_token:
         raise HTTPException(
             status_code=400,
             detail=f"No X account connected for brand {brand_id}"
         )
     
-    # 4. Search tweets
-    response = await x_api.search_recent(
-        access_token=access_token,
-        query=query,
-        since_id=None  # TODO: Track last_id later
+    keywords_lower, watched_accounts = brand_filter_inputs(
+        tuple(keywords),
+        tuple(brand_config.get("watched_accounts") or [])
     )
     
-    tweets = response.get("data", [])
-    print(f"📥 Fetched {len(tweets)} tweets from search")
+    # 4 + 5. Search tweets, filtering each page while the next one downloads
+    tweets = []
+    results = []
+    try:
+        async for page in x_api.iter_pages(
+            lambda token: x_api.search_recent(
+                access_token=access_token,
+                query=query,
+                since_id=None,  # TODO: Track last_id later
+                next_token=token
+            )
+        ):
+            tweets.extend(page)
+            results.extend(tweet_filter.should_respond_batch(
+                tweets=page,
+                keywords_lower=keywords_lower,
+                whitelisted_authors=watched_accounts,
+                min_relevance_score=0.5
+            ))
+    except httpx.HTTPStatusError as e:
+        if e.response.status_code == 401:
+            # X rejected the cached token; make the next request fetch a fresh one
+            token_manager.invalidate(brand_id)
+        raise
     
-    # 5. Filter tweets
-    candidates = []
-    failed_count = 0
+    logger.info("📥 Fetched %d tweets from search for %s", len(tweets), brand_id)
     
-    watched_accounts = brand_config.get("watched_accounts", [])
+    candidates = _build_candidates(tweets, results)
+    failed_count = len(tweets) - len(candidates)
     
-    for tweet in tweets:
-        # Check if spam
-        if tweet_filter.is_spam(tweet):
-            failed_count += 1
-            continue
-        
-        # Check if should respond
-        should_respond, risk_flags, score = tweet_filter.should_respond(
-            tweet=tweet,
-            keywords=keywords,
-            whitelisted_authors=watched_accounts,
-            min_relevance_score=0.5
-        )
-        
-        if should_respond:
-            candidates.append({
-                "tweet_id": tweet.get("id"),
-                "text": tweet.get("text"),
-                "author_id": tweet.get("author_id"),
-                "created_at": tweet.get("created_at"),
-                "relevance_score": score,
-                "url": f"https://x.com/user/status/{tweet.get('id')}"
-            })
-        else:
-            failed_count += 1
-    
-    print(f"✅ {len(candidates)} candidates passed filter")
-    print(f"❌ {failed_count} tweets filtered out")
+    logger.info(
+        "✅ %d candidates passed filter, ❌ %d tweets filtered out",
+        len(candidates), failed_count
+    )
     
-    return FetchResponse(
+    return _json_response(FetchResponse(
         brand_id=brand_id,
         total_fetched=len(tweets),
         passed_filter=len(candidates),
         failed_filter=failed_count,
         candidates=candidates
-    )
+    ))
 
 
 @app.get("/brands")
@@ -302,5 +415,7 @@ async def get_brand(brand_id: str):
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host=settings.host, port=settings.port)
+    # uvloop and httptools ship with uvicorn[standard]; request them explicitly
+    # so a missing install fails at startup instead of silently using asyncio
+    uvicorn.run(app, host=settings.host, port=settings.port, loop="uvloop", http="httptools")
 
@@ -8,25 +8,63 @@ We use direct API calls (not Composio SDK) for more control over:
 - Following hackathon spec exactly
 """
 
+import asyncio
+import functools
+import logging
+import time
 import httpx
-from typing import List, Dict, Optional
+from typing import AsyncIterator, Awaitable, Callable, List, Dict, Optional, Tuple
 from datetime import datetime
 
 from app.config import settings
 
 
+logger = logging.getLogger(__name__)
+
+# Wait out a 429 in place only if the window reopens within this many seconds
+MAX_RATE_LIMIT_WAIT = 5.0
+
+
+class RateLimitedError(Exception):
+    """Raised when an X API rate-limit window will not reopen soon."""
+    
+    def __init__(self, endpoint: str, retry_after: float):
+        super().__init__(f"Rate limited on {endpoint}; retry in {retry_after:.0f}s")
+        self.endpoint = endpoint
+        self.retry_after = retry_after
+
+
 class XAPIClient:
     """Client for direct X API v2 calls."""
     
     def __init__(self):
         self.base_url = settings.x_api_base
         self.max_results = settings.max_results_per_poll
+        self.max_pages = settings.max_pages_per_fetch
+        
+        # Long-lived HTTP/2 client: concurrent requests (e.g. batch polling)
+        # are multiplexed over a few pooled connections
+        self._client = httpx.AsyncClient(
+            http2=True,
+            timeout=30.0,
+            limits=httpx.Limits(
+                max_connections=20,
+                max_keepalive_connections=20,
+                keepalive_expiry=30.0
+            ),
+            headers={"User-Agent": "x-fetcher"}
+        )
+    
+    async def aclose(self):
+        """Close the underlying HTTP client."""
+        await self._client.aclose()
     
     async def get_mentions(
         self,
         access_token: str,
         user_id: str,
-        since_id: Optional[str] = None
+        since_id: Optional[str] = None,
+        pagination_token: Optional[str] = None
     ) -> Dict:
         """
         Fetch mentions for a user.
@@ -38,6 +76,7 @@ class XAPIClient:
             access_token: OAuth token from Composio
             user_id: X user ID
             since_id: Only return tweets after this ID
+            pagination_token: meta.next_token from the previous page
             
         Returns:
             API response dict with tweets
@@ -46,7 +85,7 @@ class XAPIClient:
         
         params = {
             "max_results": self.max_results,
-            "expansions": "author_id,referenced_tweets.id",
+            "expansions": "author_id",
             "tweet.fields": "created_at,lang,public_metrics,conversation_id,author_id",
             "user.fields": "username,name,verified"
         }
@@ -54,34 +93,27 @@ class XAPIClient:
         if since_id:
             params["since_id"] = since_id
         
+        if pagination_token:
+            params["pagination_token"] = pagination_token
+        
         headers = {
             "Authorization": f"Bearer {access_token}"
         }
         
         try:
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                response = await client.get(url, params=params, headers=headers)
-                
-                # Check rate limit headers
-                self._log_rate_limit(response.headers, "mentions")
-                
-                response.raise_for_status()
-                return response.json()
-                
-        except httpx.HTTPStatusError as e:
-            if e.response.status_code == 429:
-                print(f"⚠️  Rate limit hit for mentions. Wait and retry.")
-                return {"data": [], "meta": {"result_count": 0}}
+            return await self._get_json(url, params, headers, "mentions")
+        except (RateLimitedError, httpx.HTTPStatusError):
             raise
-        except Exception as e:
-            print(f"Error fetching mentions: {e}")
+        except Exception:
+            logger.exception("Error fetching mentions")
             return {"data": [], "meta": {"result_count": 0}}
     
     async def search_recent(
         self,
         access_token: str,
         query: str,
-        since_id: Optional[str] = None
+        since_id: Optional[str] = None,
+        next_token: Optional[str] = None
     ) -> Dict:
         """
         Search recent tweets matching a query.
@@ -93,6 +125,7 @@ class XAPIClient:
             access_token: OAuth token from Composio
             query: Search query (e.g., "(brand OR keyword) lang:en -is:retweet")
             since_id: Only return tweets after this ID
+            next_token: meta.next_token from the previous page
             
         Returns:
             API response dict with tweets
@@ -102,7 +135,7 @@ class XAPIClient:
         params = {
             "query": query,
             "max_results": self.max_results,
-            "expansions": "author_id,referenced_tweets.id",
+            "expansions": "author_id",
             "tweet.fields": "created_at,lang,public_metrics,conversation_id,author_id",
             "user.fields": "username,name,verified"
         }
@@ -110,27 +143,19 @@ class XAPIClient:
         if since_id:
             params["since_id"] = since_id
         
+        if next_token:
+            params["next_token"] = next_token
+        
         headers = {
             "Authorization": f"Bearer {access_token}"
         }
         
         try:
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                response = await client.get(url, params=params, headers=headers)
-                
-                # Check rate limit headers
-                self._log_rate_limit(response.headers, "search")
-                
-                response.raise_for_status()
-                return response.json()
-                
-        except httpx.HTTPStatusError as e:
-            if e.response.status_code == 429:
-                print(f"⚠️  Rate limit hit for search. Wait and retry.")
-                return {"data": [], "meta": {"result_count": 0}}
+            return await self._get_json(url, params, headers, "search")
+        except (RateLimitedError, httpx.HTTPStatusError):
             raise
-        except Exception as e:
-            print(f"Error searching tweets: {e}")
+        except Exception:
+            logger.exception("Error searching tweets")
             return {"data": [], "meta": {"result_count": 0}}
     
     async def get_tweet(
@@ -159,30 +184,135 @@ class XAPIClient:
         headers = {"Authorization": f"Bearer {access_token}"}
         
         try:
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                response = await client.get(url, params=params, headers=headers)
-                response.raise_for_status()
-                return response.json().get("data")
-        except Exception as e:
-            print(f"Error fetching tweet {tweet_id}: {e}")
+            response = await self._client.get(url, params=params, headers=headers)
+            response.raise_for_status()
+            return response.json().get("data")
+        except Exception:
+            logger.exception("Error fetching tweet %s", tweet_id)
             return None
     
+    async def _get_json(
+        self,
+        url: str,
+        params: Dict,
+        headers: Dict,
+        endpoint: str
+    ) -> Dict:
+        """
+        GET a JSON endpoint, waiting out short rate-limit windows.
+        
+        On 429 the request is retried once if the window reopens within
+        MAX_RATE_LIMIT_WAIT seconds; otherwise RateLimitedError is raised
+        so the caller can defer this brand instead of treating the empty
+        response as "no tweets".
+        """
+        for attempt in range(2):
+            response = await self._client.get(url, params=params, headers=headers)
+            
+            # Check rate limit headers
+            self._log_rate_limit(response.headers, endpoint)
+            
+            if response.status_code != 429:
+                response.raise_for_status()
+                return response.json()
+            
+            wait = self._retry_after(response.headers)
+            if attempt or wait > MAX_RATE_LIMIT_WAIT:
+                logger.warning(
+                    "⚠️  Rate limit hit for %s. Window reopens in %.0f seconds.",
+                    endpoint, wait
+                )
+                raise RateLimitedError(endpoint, wait)
+            
+            logger.warning(
+                "⚠️  Rate limit hit for %s. Retrying in %.1f seconds.",
+                endpoint, wait
+            )
+            await asyncio.sleep(wait)
+    
+    @staticmethod
+    def _retry_after(headers: httpx.Headers) -> float:
+        """Seconds until the rate-limit window reopens (Retry-After or reset)."""
+        try:
+            if "retry-after" in headers:
+                return max(0.0, float(headers["retry-after"]))
+            if "x-rate-limit-reset" in headers:
+                return max(0.0, int(headers["x-rate-limit-reset"]) - time.time())
+        except ValueError:
+            pass
+        return 1.0
+    
+    async def iter_pages(
+        self,
+        fetch_page: Callable[[Optional[str]], Awaitable[Dict]]
+    ) -> AsyncIterator[List[Dict]]:
+        """
+        Yield pages of tweets, prefetching the next page.
+        
+        The request for page N+1 is already in flight while the caller
+        processes page N. At most `max_pages` pages are fetched. Only a
+        failure on the first page is raised; if a later page fails, the
+        pages already yielded are kept and iteration stops.
+        
+        Args:
+            fetch_page: Called with the previous page's next_token (None
+                for the first page); returns an API response dict
+            
+        Yields:
+            List of tweets per page
+        """
+        task = asyncio.create_task(fetch_page(None))
+        try:
+            for page in range(self.max_pages):
+                try:
+                    response = await task
+                except Exception as e:
+                    # Keep the pages already yielded; only the first page fails the fetch
+                    if page == 0:
+                        raise
+                    logger.warning("Stopping after %d page(s): %s", page, e)
+                    task = None
+                    return
+                task = None
+                
+                next_token = response.get("meta", {}).get("next_token")
+                if next_token and page + 1 < self.max_pages:
+                    task = asyncio.create_task(fetch_page(next_token))
+                    # Let the request get on the wire before the caller
+                    # starts its (synchronous) work on this page
+                    await asyncio.sleep(0)
+                
+                yield response.get("data", [])
+                
+                if task is None:
+                    return
+        finally:
+            if task is not None:
+                task.cancel()
+    
     def _log_rate_limit(self, headers: httpx.Headers, endpoint: str):
         """Log rate limit information from response headers."""
         remaining = headers.get("x-rate-limit-remaining")
         reset = headers.get("x-rate-limit-reset")
         
         if remaining and reset:
-            reset_time = datetime.fromtimestamp(int(reset))
-            print(f"📊 Rate limit [{endpoint}]: {remaining} remaining, resets at {reset_time}")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(
+                    "📊 Rate limit [%s]: %s remaining, resets at %s",
+                    endpoint, remaining, datetime.fromtimestamp(int(reset))
+                )
             
             # Warn if running low
             if int(remaining) < 10:
-                print(f"⚠️  Low rate limit for {endpoint}! Only {remaining} requests left.")
+                logger.warning(
+                    "⚠️  Low rate limit for %s! Only %s requests left.",
+                    endpoint, remaining
+                )
     
+    @staticmethod
+    @functools.lru_cache(maxsize=256)
     def build_search_query(
-        self,
-        keywords: List[str],
+        keywords: Tuple[str, ...],
         brand_handle: Optional[str] = None,
         exclude_retweets: bool = True,
         exclude_replies: bool = True,
@@ -191,8 +321,10 @@ class XAPIClient:
         """
         Build optimized search query.
         
+        Cached per brand configuration, since polls repeat the same inputs.
+        
         Args:
-            keywords: List of keywords/phrases
+            keywords: Tuple of keywords/phrases (hashable for the cache)
             brand_handle: Twitter handle (without @)
             exclude_retweets: Exclude retweets
             exclude_replies: Exclude replies
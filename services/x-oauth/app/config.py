@@ -28,6 +28,11 @@ class Settings(BaseSettings):
     # Supabase
     supabase_url: str
     supabase_service_key: str
+    supabase_db_password: str = ""
+    
+    # Database pool (sized for concurrent token reads and refreshes)
+    db_pool_min_size: int = 5
+    db_pool_max_size: int = 50
     
     # Security
     secret_key: str = "change-me-in-production"
@@ -2,6 +2,7 @@
 Database operations for storing OAuth credentials in Supabase.
 """
 
+import asyncio
 import asyncpg
 from typing import Optional, Dict
 from datetime import datetime
@@ -9,6 +10,53 @@ from datetime import datetime
 from app.config import settings
 
 
+# Seconds to wait for a graceful pool close before terminating connections
+POOL_CLOSE_TIMEOUT = 10.0
+
+# Query text is kept constant so asyncpg's per-connection prepared
+# statement cache (keyed by query text) reuses the parsed plan on every call.
+SAVE_TOKEN_SQL = """
+    INSERT INTO oauth_credential (
+        brand_id,
+        provider,
+        access_token,
+        refresh_token,
+        expires_at,
+        scope,
+        token_type,
+        created_at,
+        updated_at
+    ) VALUES ($1, 'x', $2, $3, to_timestamp($4), $5, $6, NOW(), NOW())
+    ON CONFLICT (brand_id, provider)
+    DO UPDATE SET
+        access_token = EXCLUDED.access_token,
+        refresh_token = EXCLUDED.refresh_token,
+        expires_at = EXCLUDED.expires_at,
+        scope = EXCLUDED.scope,
+        token_type = EXCLUDED.token_type,
+        updated_at = NOW()
+    RETURNING
+        access_token,
+        refresh_token,
+        EXTRACT(EPOCH FROM expires_at)::bigint as expires_at,
+        scope,
+        token_type
+"""
+
+GET_TOKEN_SQL = """
+    SELECT
+        access_token,
+        refresh_token,
+        EXTRACT(EPOCH FROM expires_at)::bigint as expires_at,
+        scope,
+        token_type
+    FROM oauth_credential
+    WHERE brand_id = $1 AND provider = 'x'
+"""
+
+DELETE_TOKEN_SQL = "DELETE FROM oauth_credential WHERE brand_id = $1 AND provider = 'x'"
+
+
 class TokenStore:
     """Store and retrieve OAuth tokens from Supabase."""
     
@@ -36,16 +84,24 @@ class TokenStore:
                 host=f"db.{settings.supabase_url.split('//')[1].split('.')[0]}.supabase.co",
                 port=5432,
                 user="postgres",
-                password="your_supabase_password",  # Set via env
+                password=settings.supabase_db_password,
                 database="postgres",
-                min_size=1,
-                max_size=10
+                min_size=settings.db_pool_min_size,
+                max_size=settings.db_pool_max_size,
+                # Keep idle connections across poll intervals
+                max_inactive_connection_lifetime=300.0,
+                statement_cache_size=256,
+                command_timeout=10.0
             )
     
     async def close(self):
         """Close database connection pool."""
         if self.pool:
-            await self.pool.close()
+            try:
+                await asyncio.wait_for(self.pool.close(), POOL_CLOSE_TIMEOUT)
+            except asyncio.TimeoutError:
+                print("Pool close timed out; terminating connections")
+                self.pool.terminate()
             self.pool = None
     
     async def save_token(
@@ -56,7 +112,7 @@ class TokenStore:
         expires_at: int,
         scope: str,
         token_type: str = "Bearer"
-    ) -> bool:
+    ) -> Optional[Dict[str, any]]:
         """
         Save or update OAuth credentials for a brand.
         
@@ -69,37 +125,15 @@ class TokenStore:
             token_type: Token type (usually "Bearer")
             
         Returns:
-            True if successful
+            Saved token dict (same shape as get_token) or None on failure
         """
         if not self.pool:
             await self.connect()
         
-        query = """
-            INSERT INTO oauth_credential (
-                brand_id,
-                provider,
-                access_token,
-                refresh_token,
-                expires_at,
-                scope,
-                token_type,
-                created_at,
-                updated_at
-            ) VALUES ($1, 'x', $2, $3, to_timestamp($4), $5, $6, NOW(), NOW())
-            ON CONFLICT (brand_id, provider)
-            DO UPDATE SET
-                access_token = EXCLUDED.access_token,
-                refresh_token = EXCLUDED.refresh_token,
-                expires_at = EXCLUDED.expires_at,
-                scope = EXCLUDED.scope,
-                token_type = EXCLUDED.token_type,
-                updated_at = NOW()
-        """
-        
         try:
             async with self.pool.acquire() as conn:
-                await conn.execute(
-                    query,
+                row = await conn.fetchrow(
+                    SAVE_TOKEN_SQL,
                     brand_id,
                     access_token,
                     refresh_token,
@@ -107,10 +141,10 @@ class TokenStore:
                     scope,
                     token_type
                 )
-            return True
+                return dict(row) if row else None
         except Exception as e:
             print(f"Error saving token: {e}")
-            return False
+            return None
     
     async def get_token(self, brand_id: str) -> Optional[Dict[str, any]]:
         """
@@ -125,20 +159,9 @@ class TokenStore:
         if not self.pool:
             await self.connect()
         
-        query = """
-            SELECT
-                access_token,
-                refresh_token,
-                EXTRACT(EPOCH FROM expires_at)::bigint as expires_at,
-                scope,
-                token_type
-            FROM oauth_credential
-            WHERE brand_id = $1 AND provider = 'x'
-        """
-        
         try:
             async with self.pool.acquire() as conn:
-                row = await conn.fetchrow(query, brand_id)
+                row = await conn.fetchrow(GET_TOKEN_SQL, brand_id)
                 if row:
                     return dict(row)
                 return None
@@ -159,11 +182,9 @@ class TokenStore:
         if not self.pool:
             await self.connect()
         
-        query = "DELETE FROM oauth_credential WHERE brand_id = $1 AND provider = 'x'"
-        
         try:
             async with self.pool.acquire() as conn:
-                await conn.execute(query, brand_id)
+                await conn.execute(DELETE_TOKEN_SQL, brand_id)
             return True
         except Exception as e:
             print(f"Error deleting token: {e}")
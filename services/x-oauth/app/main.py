@@ -4,20 +4,59 @@ X OAuth Service - FastAPI application.
 Handles OAuth 2.0 PKCE flow for obtaining X API tokens.
 """
 
-from contextlib import asynccontextmanager
-from typing import Optional
+import time
+from collections import OrderedDict
+from contextlib import AsyncExitStack, asynccontextmanager
+from typing import Dict, Optional, Tuple
 
 from fastapi import FastAPI, HTTPException, Request, Query
 from fastapi.responses import RedirectResponse, JSONResponse
 from pydantic import BaseModel
 
 from app.config import settings
-from app.oauth import XOAuthClient, PKCEHelper
+from app.oauth import XOAuthClient, PKCEHelper, close_client
 from app.database import token_store
 
 
+class OAuthStateStore:
+    """
+    In-memory OAuth state storage with a size cap and TTL.
+    
+    Abandoned flows never reach the callback, so entries are evicted
+    oldest-first on insert. Expired states are treated as missing.
+    """
+    
+    def __init__(self, max_size: int = 10_000, ttl_seconds: float = 600):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._states: "OrderedDict[str, Tuple[float, Dict]]" = OrderedDict()
+    
+    def set(self, state: str, value: Dict):
+        """Store state data, evicting expired or excess entries."""
+        now = time.monotonic()
+        self._states[state] = (now, value)
+        self._states.move_to_end(state)
+        
+        cutoff = now - self.ttl_seconds
+        while self._states:
+            created_at, _ = next(iter(self._states.values()))
+            if len(self._states) <= self.max_size and created_at >= cutoff:
+                break
+            self._states.popitem(last=False)
+    
+    def pop(self, state: str) -> Optional[Dict]:
+        """Remove and return state data, or None if unknown or expired."""
+        entry = self._states.pop(state, None)
+        if entry is None:
+            return None
+        created_at, value = entry
+        if time.monotonic() - created_at > self.ttl_seconds:
+            return None
+        return value
+
+
 # In-memory storage for OAuth states (use Redis in production)
-oauth_states = {}
+oauth_states = OAuthStateStore()
 
 
 @asynccontextmanager
@@ -25,17 +64,22 @@ async def lifespan(app: FastAPI):
     """Application lifespan manager."""
     print("🚀 Starting X OAuth Service...")
     
-    # Initialize database connection
-    await token_store.connect()
-    print("✅ Database connected")
-    
-    print(f"Server ready on port {settings.port}")
+    # Registered resources are released in reverse order even if startup
+    # or shutdown raises
+    async with AsyncExitStack() as stack:
+        stack.push_async_callback(close_client)
+        
+        # Initialize database connection
+        await token_store.connect()
+        stack.push_async_callback(token_store.close)
+        print("✅ Database connected")
+        
+        print(f"Server ready on port {settings.port}")
+        
+        yield
+        
+        print("Shutting down...")
     
-    yield
-    
-    # Cleanup
-    print("Shutting down...")
-    await token_store.close()
     print("Goodbye!")
 
 
@@ -46,6 +90,9 @@ app = FastAPI(
     lifespan=lifespan
 )
 
+# Shared OAuth client (holds only settings-derived values)
+oauth_client = XOAuthClient()
+
 
 class ConnectionRequest(BaseModel):
     """Request to start OAuth flow."""
@@ -87,19 +134,17 @@ async def start_oauth_flow(request: ConnectionRequest):
     to grant access to their X account.
     """
     # Generate PKCE parameters
-    code_verifier = PKCEHelper.generate_code_verifier()
-    code_challenge = PKCEHelper.generate_code_challenge(code_verifier)
+    code_verifier, code_challenge = PKCEHelper.generate_pair()
     state = PKCEHelper.generate_state()
     
     # Store state for verification in callback
-    oauth_states[state] = {
+    oauth_states.set(state, {
         'brand_id': request.brand_id,
         'code_verifier': code_verifier,
         'redirect_after_success': request.redirect_after_success
-    }
+    })
     
     # Generate authorization URL
-    oauth_client = XOAuthClient()
     auth_url = oauth_client.get_authorization_url(state, code_challenge)
     
     return ConnectionResponse(
@@ -129,21 +174,19 @@ async def oauth_callback(
             }
         )
     
-    # Verify state parameter
-    if state not in oauth_states:
+    # Verify and retrieve stored OAuth state
+    oauth_state = oauth_states.pop(state)
+    if oauth_state is None:
         raise HTTPException(
             status_code=400,
             detail="Invalid state parameter (possible CSRF attack)"
         )
     
-    # Retrieve stored OAuth state
-    oauth_state = oauth_states.pop(state)
     brand_id = oauth_state['brand_id']
     code_verifier = oauth_state['code_verifier']
     redirect_url = oauth_state.get('redirect_after_success')
     
     # Exchange code for tokens
-    oauth_client = XOAuthClient()
     try:
         token_response = await oauth_client.exchange_code_for_token(
             code=code,
@@ -187,7 +230,9 @@ async def oauth_callback(
     }
 
 
-@app.post("/x/refresh/{brand_id}")
+# Token endpoints return plain dicts; TokenResponse documents them in
+# OpenAPI without re-validating every response.
+@app.post("/x/refresh/{brand_id}", responses={200: {"model": TokenResponse}})
 async def refresh_token(brand_id: str):
     """
     Refresh expired access token for a brand.
@@ -203,7 +248,6 @@ async def refresh_token(brand_id: str):
         )
     
     # Refresh the token
-    oauth_client = XOAuthClient()
     try:
         token_response = await oauth_client.refresh_access_token(
             refresh_token=current_tokens['refresh_token']
@@ -219,8 +263,8 @@ async def refresh_token(brand_id: str):
         token_response.get('expires_in', 7200)
     )
     
-    # Update tokens in database
-    success = await token_store.save_token(
+    # Update tokens in database; the saved row comes back from the upsert
+    saved = await token_store.save_token(
         brand_id=brand_id,
         access_token=token_response['access_token'],
         refresh_token=token_response.get('refresh_token', current_tokens['refresh_token']),
@@ -228,23 +272,23 @@ async def refresh_token(brand_id: str):
         scope=token_response.get('scope', current_tokens['scope'])
     )
     
-    if not success:
+    if not saved:
         raise HTTPException(
             status_code=500,
             detail="Failed to save refreshed tokens"
         )
     
-    return TokenResponse(
-        brand_id=brand_id,
-        access_token=token_response['access_token'],
-        expires_at=expires_at,
-        scope=token_response.get('scope', current_tokens['scope']),
-        message="Token refreshed successfully"
-    )
+    return {
+        "brand_id": brand_id,
+        "access_token": saved['access_token'],
+        "expires_at": saved['expires_at'],
+        "scope": saved['scope'],
+        "message": "Token refreshed successfully"
+    }
 
 
-@app.get("/x/token/{brand_id}")
-async def get_token(brand_id: str) -> TokenResponse:
+@app.get("/x/token/{brand_id}", responses={200: {"model": TokenResponse}})
+async def get_token(brand_id: str):
     """
     Get current access token for a brand.
     
@@ -259,19 +303,18 @@ async def get_token(brand_id: str) -> TokenResponse:
         )
     
     # Check if token needs refresh
-    oauth_client = XOAuthClient()
     if oauth_client.is_token_expired(tokens['expires_at']):
         # Token expired, refresh it
         refresh_response = await refresh_token(brand_id)
         return refresh_response
     
-    return TokenResponse(
-        brand_id=brand_id,
-        access_token=tokens['access_token'],
-        expires_at=tokens['expires_at'],
-        scope=tokens['scope'],
-        message="Token retrieved successfully"
-    )
+    return {
+        "brand_id": brand_id,
+        "access_token": tokens['access_token'],
+        "expires_at": tokens['expires_at'],
+        "scope": tokens['scope'],
+        "message": "Token retrieved successfully"
+    }
 
 
 @app.delete("/x/disconnect/{brand_id}")
@@ -290,7 +333,6 @@ async def disconnect(brand_id: str):
         )
     
     # Revoke tokens with X
-    oauth_client = XOAuthClient()
     await oauth_client.revoke_token(tokens['access_token'], "access_token")
     if tokens.get('refresh_token'):
         await oauth_client.revoke_token(tokens['refresh_token'], "refresh_token")
@@ -9,8 +9,8 @@ import base64
 import hashlib
 import secrets
 import time
-from typing import Dict, Optional
-from urllib.parse import urlencode
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import quote_plus, urlencode
 
 import httpx
 from fastapi import HTTPException
@@ -18,6 +18,29 @@ from fastapi import HTTPException
 from app.config import settings
 
 
+# Shared client so token calls reuse pooled keep-alive connections
+_client: Optional[httpx.AsyncClient] = None
+
+
+async def get_client() -> httpx.AsyncClient:
+    """Return the shared HTTP client, creating it on first use."""
+    global _client
+    if _client is None:
+        _client = httpx.AsyncClient(
+            timeout=30.0,
+            limits=httpx.Limits(max_keepalive_connections=20, keepalive_expiry=60)
+        )
+    return _client
+
+
+async def close_client():
+    """Close the shared HTTP client."""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
 class PKCEHelper:
     """Helper for PKCE (Proof Key for Code Exchange) flow."""
     
@@ -32,6 +55,12 @@ class PKCEHelper:
         digest = hashlib.sha256(verifier.encode('utf-8')).digest()
         return base64.urlsafe_b64encode(digest).decode('utf-8').rstrip('=')
     
+    @staticmethod
+    def generate_pair() -> Tuple[str, str]:
+        """Generate a code verifier and its S256 challenge in one step."""
+        verifier = PKCEHelper.generate_code_verifier()
+        return verifier, PKCEHelper.generate_code_challenge(verifier)
+    
     @staticmethod
     def generate_state() -> str:
         """Generate a random state parameter for CSRF protection."""
@@ -49,6 +78,15 @@ class XOAuthClient:
         self.token_url = settings.x_token_url
         self.revoke_url = settings.x_revoke_url
         self.scopes = settings.x_scopes.split()
+        
+        # Everything except state and code_challenge is fixed per client
+        self._auth_prefix = f"{self.oauth_url}?" + urlencode({
+            'response_type': 'code',
+            'client_id': self.client_id,
+            'redirect_uri': self.redirect_uri,
+            'scope': ' '.join(self.scopes),
+            'code_challenge_method': 'S256'
+        })
     
     def get_authorization_url(self, state: str, code_challenge: str) -> str:
         """
@@ -61,17 +99,11 @@ class XOAuthClient:
         Returns:
             Authorization URL to redirect user to
         """
-        params = {
-            'response_type': 'code',
-            'client_id': self.client_id,
-            'redirect_uri': self.redirect_uri,
-            'scope': ' '.join(self.scopes),
-            'state': state,
-            'code_challenge': code_challenge,
-            'code_challenge_method': 'S256'
-        }
-        
-        return f"{self.oauth_url}?{urlencode(params)}"
+        return (
+            f"{self._auth_prefix}"
+            f"&state={quote_plus(state)}"
+            f"&code_challenge={quote_plus(code_challenge)}"
+        )
     
     async def exchange_code_for_token(
         self,
@@ -100,20 +132,7 @@ class XOAuthClient:
         if self.client_secret:
             data['client_secret'] = self.client_secret
         
-        try:
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                response = await client.post(
-                    self.token_url,
-                    data=data,
-                    headers={'Content-Type': 'application/x-www-form-urlencoded'}
-                )
-                response.raise_for_status()
-                return response.json()
-        except httpx.HTTPError as e:
-            raise HTTPException(
-                status_code=500,
-                detail=f"Failed to exchange code for token: {str(e)}"
-            )
+        return await self._request_token(data, "exchange code for token")
     
     async def refresh_access_token(self, refresh_token: str) -> Dict[str, any]:
         """
@@ -134,19 +153,32 @@ class XOAuthClient:
         if self.client_secret:
             data['client_secret'] = self.client_secret
         
+        return await self._request_token(data, "refresh token")
+    
+    async def _request_token(self, data: Dict[str, str], action: str) -> Dict[str, any]:
+        """
+        POST a grant to the token endpoint and decode the token response.
+        
+        Args:
+            data: Form fields for the grant
+            action: Short description used in the error detail
+            
+        Returns:
+            Token response dict
+        """
         try:
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                response = await client.post(
-                    self.token_url,
-                    data=data,
-                    headers={'Content-Type': 'application/x-www-form-urlencoded'}
-                )
-                response.raise_for_status()
-                return response.json()
-        except httpx.HTTPError as e:
+            client = await get_client()
+            response = await client.post(
+                self.token_url,
+                data=data,
+                headers={'Content-Type': 'application/x-www-form-urlencoded'}
+            )
+            response.raise_for_status()
+            return response.json()
+        except (httpx.HTTPError, ValueError) as e:
             raise HTTPException(
                 status_code=500,
-                detail=f"Failed to refresh token: {str(e)}"
+                detail=f"Failed to {action}: {str(e)}"
             )
     
     async def revoke_token(self, token: str, token_type: str = "access_token") -> bool:
@@ -170,14 +202,14 @@ class XOAuthClient:
             data['client_secret'] = self.client_secret
         
         try:
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                response = await client.post(
-                    self.revoke_url,
-                    data=data,
-                    headers={'Content-Type': 'application/x-www-form-urlencoded'}
-                )
-                response.raise_for_status()
-                return True
+            client = await get_client()
+            response = await client.post(
+                self.revoke_url,
+                data=data,
+                headers={'Content-Type': 'application/x-www-form-urlencoded'}
+            )
+            response.raise_for_status()
+            return True
         except httpx.HTTPError:
             return False
     
@@ -205,4 +237,22 @@ class XOAuthClient:
             True if token needs refresh
         """
         return time.time() >= (expires_at - buffer_seconds)
+    
+    def is_token_expired_batch(
+        self,
+        expires_at_list: List[int],
+        buffer_seconds: int = 300
+    ) -> List[bool]:
+        """
+        Check many tokens for expiry against a single clock read.
+        
+        Args:
+            expires_at_list: Unix timestamps when each token expires
+            buffer_seconds: Refresh this many seconds before expiry
+            
+        Returns:
+            One flag per token, True if it needs refresh
+        """
+        threshold = time.time() + buffer_seconds
+        return [expires_at <= threshold for expires_at in expires_at_list]
 
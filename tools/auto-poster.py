@@ -17,8 +17,15 @@ Usage:
 import asyncio
 import httpx
 import argparse
+import logging
+import sys
 import time
+from collections import OrderedDict
 from datetime import datetime
+from typing import Optional
+
+
+logger = logging.getLogger(__name__)
 
 
 # Service URLs
@@ -26,88 +33,191 @@ X_FETCHER_URL = "http://localhost:8200"
 LLM_GENERATOR_URL = "http://localhost:8300"
 X_POSTER_URL = "http://localhost:8400"
 
+# Pipeline tuning
+MAX_CONCURRENT_CANDIDATES = 3  # Replies generated in parallel
+MAX_SEEN_CONVERSATIONS = 10_000  # Conversations remembered across loop runs
+
+# X user-context posting limit
+POST_RATE_LIMIT = 300  # Posts per window
+POST_RATE_WINDOW_SECONDS = 3 * 3600
+
+
+class TokenBucket:
+    """
+    Async token bucket shared by concurrent tasks.
+    
+    Allows bursts of up to `capacity` calls, then refills at
+    capacity / period tokens per second.
+    """
+    
+    def __init__(self, capacity: int, period: float):
+        self.capacity = capacity
+        self.rate = capacity / period
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+    
+    async def acquire(self):
+        """Take one token, waiting for a refill if the bucket is empty."""
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(
+                    self.capacity,
+                    self._tokens + (now - self._updated) * self.rate
+                )
+                self._updated = now
+                
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                
+                wait = (1 - self._tokens) / self.rate
+                logger.info("⏳ Posting rate limit reached, waiting %.1f seconds...", wait)
+                await asyncio.sleep(wait)
+
+
+# Shared across loop runs so earlier bursts count against the limit
+posting_limiter = TokenBucket(POST_RATE_LIMIT, POST_RATE_WINDOW_SECONDS)
+
+
+def conversation_key(candidate: dict) -> str:
+    """Conversation a candidate belongs to (the tweet itself if unknown)."""
+    return candidate.get("conversation_id") or candidate["tweet_id"]
+
+
+def dedupe_candidates(candidates: list, seen: OrderedDict) -> list:
+    """
+    Drop candidates from conversations that were already replied to.
+    
+    New conversations are not added to `seen` here; call mark_seen once a
+    reply is posted so ones cut by max_posts or that failed are retried.
+    
+    Args:
+        candidates: Tweet candidates from X Fetcher
+        seen: Conversation IDs replied to so far
+        
+    Returns:
+        Candidates with at most one tweet per new conversation
+    """
+    unique = []
+    keys = set()
+    for candidate in candidates:
+        key = conversation_key(candidate)
+        if key in seen:
+            seen.move_to_end(key)
+            continue
+        if key in keys:
+            continue
+        keys.add(key)
+        unique.append(candidate)
+    
+    return unique
 
-async def fetch_tweets(brand_id: str) -> list:
+
+def mark_seen(seen: OrderedDict, candidate: dict):
+    """Record a candidate's conversation as replied to."""
+    key = conversation_key(candidate)
+    seen[key] = None
+    seen.move_to_end(key)
+    
+    while len(seen) > MAX_SEEN_CONVERSATIONS:
+        seen.popitem(last=False)
+
+
+async def fetch_tweets(client: httpx.AsyncClient, brand_id: str) -> list:
     """Fetch tweet candidates from X Fetcher."""
-    print(f"📥 Fetching tweets for brand: {brand_id}")
+    logger.info("📥 Fetching tweets for brand: %s", brand_id)
     
-    async with httpx.AsyncClient(timeout=30.0) as client:
-        try:
-            response = await client.post(f"{X_FETCHER_URL}/fetch/{brand_id}")
-            response.raise_for_status()
-            result = response.json()
-            
-            candidates = result.get("candidates", [])
-            print(f"✅ Found {len(candidates)} candidates")
-            return candidates
-            
-        except Exception as e:
-            print(f"❌ Failed to fetch tweets: {e}")
-            return []
+    try:
+        response = await client.post(f"{X_FETCHER_URL}/fetch/{brand_id}")
+        response.raise_for_status()
+        result = response.json()
+        
+        candidates = result.get("candidates", [])
+        logger.info("✅ Found %d candidates", len(candidates))
+        return candidates
+        
+    except Exception as e:
+        logger.error("❌ Failed to fetch tweets: %s", e)
+        return []
 
 
-async def generate_reply(candidate: dict, brand_id: str, persona: str = "normal") -> dict:
+async def generate_reply(
+    client: httpx.AsyncClient,
+    candidate: dict,
+    brand_id: str,
+    persona: str = "normal"
+) -> dict:
     """Generate reply using LLM Generator."""
-    print(f"🤖 Generating reply for tweet: {candidate['tweet_id']}")
+    logger.info("🤖 Generating reply for tweet: %s", candidate["tweet_id"])
     
-    async with httpx.AsyncClient(timeout=30.0) as client:
-        try:
-            response = await client.post(
-                f"{LLM_GENERATOR_URL}/generate",
-                json={
-                    "tweet_text": candidate["text"],
-                    "tweet_id": candidate["tweet_id"],
-                    "author_username": candidate.get("author_username"),
-                    "brand_id": brand_id,
-                    "persona": persona,
-                    "context_url": candidate["url"]
-                }
-            )
-            response.raise_for_status()
-            result = response.json()
-            
-            if result.get("is_valid"):
-                print(f"✅ Generated: {result['proposed_text']}")
-                return result
-            else:
-                print(f"⚠️  Invalid reply: {result.get('validation_error')}")
-                return None
-                
-        except Exception as e:
-            print(f"❌ Failed to generate reply: {e}")
+    try:
+        response = await client.post(
+            f"{LLM_GENERATOR_URL}/generate",
+            json={
+                "tweet_text": candidate["text"],
+                "tweet_id": candidate["tweet_id"],
+                "author_username": candidate.get("author_username"),
+                "brand_id": brand_id,
+                "persona": persona,
+                "context_url": candidate["url"]
+            }
+        )
+        response.raise_for_status()
+        result = response.json()
+        
+        if result.get("is_valid"):
+            logger.info("✅ Generated: %s", result["proposed_text"])
+            return result
+        else:
+            logger.warning("⚠️  Invalid reply: %s", result.get("validation_error"))
             return None
+            
+    except Exception as e:
+        logger.error("❌ Failed to generate reply: %s", e)
+        return None
 
 
-async def post_tweet(brand_id: str, text: str, reply_to_tweet_id: str) -> dict:
+async def post_tweet(
+    client: httpx.AsyncClient,
+    brand_id: str,
+    text: str,
+    reply_to_tweet_id: str
+) -> dict:
     """Post tweet via X Poster."""
-    print(f"📤 Posting tweet...")
+    logger.info("📤 Posting tweet...")
     
-    async with httpx.AsyncClient(timeout=30.0) as client:
-        try:
-            response = await client.post(
-                f"{X_POSTER_URL}/post",
-                json={
-                    "brand_id": brand_id,
-                    "text": text,
-                    "reply_to_tweet_id": reply_to_tweet_id
-                }
-            )
-            response.raise_for_status()
-            result = response.json()
-            
-            if result.get("success"):
-                print(f"✅ Posted! {result.get('tweet_url')}")
-                return result
-            else:
-                print(f"❌ Post failed: {result.get('error')}")
-                return None
-                
-        except Exception as e:
-            print(f"❌ Failed to post tweet: {e}")
+    try:
+        response = await client.post(
+            f"{X_POSTER_URL}/post",
+            json={
+                "brand_id": brand_id,
+                "text": text,
+                "reply_to_tweet_id": reply_to_tweet_id
+            }
+        )
+        response.raise_for_status()
+        result = response.json()
+        
+        if result.get("success"):
+            logger.info("✅ Posted! %s", result.get("tweet_url"))
+            return result
+        else:
+            logger.error("❌ Post failed: %s", result.get("error"))
             return None
+            
+    except Exception as e:
+        logger.error("❌ Failed to post tweet: %s", e)
+        return None
 
 
-async def run_pipeline(brand_id: str, persona: str = "normal", max_posts: int = 5):
+async def run_pipeline(
+    brand_id: str,
+    persona: str = "normal",
+    max_posts: int = 5,
+    seen_conversations: Optional[OrderedDict] = None
+):
     """
     Run the complete auto-post pipeline.
     
@@ -115,85 +225,92 @@ async def run_pipeline(brand_id: str, persona: str = "normal", max_posts: int =
         brand_id: Brand UUID
         persona: Reply persona (normal/smart/technical/unhinged)
         max_posts: Maximum number of posts per run
+        seen_conversations: Conversations handled by earlier runs, if any
     """
-    print("=" * 70)
-    print(f"🚀 Auto-Poster Pipeline Started")
-    print(f"   Brand ID: {brand_id}")
-    print(f"   Persona: {persona}")
-    print(f"   Max Posts: {max_posts}")
-    print(f"   Time: {datetime.now().isoformat()}")
-    print("=" * 70)
-    print()
-    
-    # 1. Fetch tweets
-    candidates = await fetch_tweets(brand_id)
-    
-    if not candidates:
-        print("No candidates found. Exiting.")
-        return
-    
-    # Limit to max_posts
-    candidates = candidates[:max_posts]
-    
-    # 2. For each candidate: generate reply and post
-    posted_count = 0
-    failed_count = 0
-    
-    for i, candidate in enumerate(candidates, 1):
-        print(f"\n--- Candidate {i}/{len(candidates)} ---")
-        print(f"Tweet: {candidate['text'][:80]}...")
-        print(f"Author: @{candidate.get('author_username', 'unknown')}")
-        print()
+    logger.info(
+        "%s\n🚀 Auto-Poster Pipeline Started\n"
+        "   Brand ID: %s\n   Persona: %s\n   Max Posts: %s\n   Time: %s\n%s\n",
+        "=" * 70, brand_id, persona, max_posts, datetime.now().isoformat(), "=" * 70
+    )
+    
+    # One client for the whole run so every call reuses pooled connections
+    async with httpx.AsyncClient(timeout=30.0) as client:
+        # 1. Fetch tweets
+        candidates = await fetch_tweets(client, brand_id)
         
-        # Generate reply
-        reply = await generate_reply(candidate, brand_id, persona)
+        if not candidates:
+            logger.info("No candidates found. Exiting.")
+            return
         
-        if not reply:
-            failed_count += 1
-            continue
+        # One reply per conversation, then limit to max_posts
+        if seen_conversations is None:
+            seen_conversations = OrderedDict()
+        candidates = dedupe_candidates(candidates, seen_conversations)[:max_posts]
         
-        # Post tweet
-        result = await post_tweet(
-            brand_id=brand_id,
-            text=reply["proposed_text"],
-            reply_to_tweet_id=candidate["tweet_id"]
-        )
+        if not candidates:
+            logger.info("No new conversations found. Exiting.")
+            return
         
-        if result:
-            posted_count += 1
-        else:
-            failed_count += 1
+        # 2. Generate and post in parallel; posts draw from the rate limiter
+        semaphore = asyncio.Semaphore(MAX_CONCURRENT_CANDIDATES)
         
-        # Rate limit: wait between posts
-        if i < len(candidates):
-            print("⏳ Waiting 5 seconds before next post...")
-            await asyncio.sleep(5)
+        async def handle(i: int, candidate: dict) -> bool:
+            async with semaphore:
+                logger.info(
+                    "\n--- Candidate %d/%d ---\nTweet: %s...\nAuthor: @%s\n",
+                    i, len(candidates), candidate["text"][:80],
+                    candidate.get("author_username", "unknown")
+                )
+                
+                # Generate reply
+                reply = await generate_reply(client, candidate, brand_id, persona)
+                
+                if not reply:
+                    return False
+                
+                # Post tweet
+                await posting_limiter.acquire()
+                result = await post_tweet(
+                    client,
+                    brand_id=brand_id,
+                    text=reply["proposed_text"],
+                    reply_to_tweet_id=candidate["tweet_id"]
+                )
+                if not result:
+                    return False
+                
+                mark_seen(seen_conversations, candidate)
+                return True
+        
+        results = await asyncio.gather(
+            *(handle(i, candidate) for i, candidate in enumerate(candidates, 1))
+        )
+        posted_count = sum(results)
+        failed_count = len(results) - posted_count
     
     # Summary
-    print()
-    print("=" * 70)
-    print(f"✅ Pipeline Complete!")
-    print(f"   Posted: {posted_count}")
-    print(f"   Failed: {failed_count}")
-    print(f"   Total: {len(candidates)}")
-    print("=" * 70)
+    logger.info(
+        "\n%s\n✅ Pipeline Complete!\n   Posted: %d\n   Failed: %d\n   Total: %d\n%s",
+        "=" * 70, posted_count, failed_count, len(candidates), "=" * 70
+    )
 
 
 async def run_loop(brand_id: str, persona: str, max_posts: int, interval: int):
     """Run pipeline in a loop."""
-    print(f"🔄 Running in loop mode (every {interval} seconds)")
-    print("Press Ctrl+C to stop")
-    print()
+    logger.info("🔄 Running in loop mode (every %d seconds)\nPress Ctrl+C to stop\n", interval)
+    
+    seen_conversations = OrderedDict()
     
     try:
         while True:
-            await run_pipeline(brand_id, persona, max_posts)
-            print(f"\n⏳ Waiting {interval} seconds until next run...")
-            print(f"   Next run at: {datetime.fromtimestamp(time.time() + interval).isoformat()}")
-            print()
+            await run_pipeline(brand_id, persona, max_posts, seen_conversations)
+            logger.info(
+                "\n⏳ Waiting %d seconds until next run...\n   Next run at: %s\n",
+                interval, datetime.fromtimestamp(time.time() + interval).isoformat()
+            )
             await asyncio.sleep(interval)
     except KeyboardInterrupt:
-        print("\n\n🛑 Stopped by user")
+        logger.info("\n\n🛑 Stopped by user")
 
 
 def main():
@@ -231,6 +348,8 @@ def main():
     
     args = parser.parse_args()
     
+    logging.basicConfig(stream=sys.stdout, level=logging.INFO, format="%(message)s")
+    
     # Run pipeline
     if args.loop:
         asyncio.run(run_loop(